@@ -0,0 +1,130 @@
+"""
+Compares the row-by-row upload ingest with the set-based CommissionWriter.
+
+Run from the server directory:
+    python -m benchmarks.ingest_benchmark [--candidates 600] [--professors 150] [--url postgresql://...]
+
+Without --url an in-memory SQLite database is used. SQLite has no network latency and can't return the generated ids of
+a multi-row INSERT in parameter order, so the students are still inserted one at a time there: use a PostgreSQL URL to
+measure the actual deployment.
+"""
+import argparse
+import time
+
+import sqlalchemy as sa
+import sqlalchemy.exc
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from benchmarks.synthetic import synthetic_rows
+from ingest import CommissionWriter, EntryRecord
+from model import Degree, UniversityRole
+from model.model import Base, Commission, CommissionEntry, Professor, Student
+
+
+def legacy_ingest(session: Session, rows: list[dict], title: str) -> int:
+    """
+    The ingest loop that /upload used before the CommissionWriter, kept here as the baseline.
+    """
+
+    def get_or_create_professor(name, surname):
+        if name is None or surname is None or name == "" or surname == "" or name == "None" or surname == "None":
+            return None
+
+        try:
+            prof = session.query(Professor).filter_by(name=name, surname=surname).one()
+        except sqlalchemy.exc.NoResultFound:
+            prof = Professor(name, surname, UniversityRole.UNSPECIFIED)
+            session.add(prof)
+        return prof
+
+    commission = Commission(title=title)
+    session.add(commission)
+
+    for row in rows:
+        row = {k: 'None' if v is None else v for k, v in row.items()}
+        student = Student(
+            matriculation_number=row['MATRICOLA'],
+            name=row['NOME'],
+            surname=row['COGNOME'],
+            phone_number=row['CELLULARE'],
+            personal_email=row['EMAIL'],
+            university_email=row['EMAIL_ATENEO']
+        )
+        session.add(student)
+
+        professor = get_or_create_professor(row['REL_NOME'], row['REL_COGNOME'])
+        professor2 = get_or_create_professor(row['REL2_NOME'], row['REL2_COGNOME'])
+        counter_supervisor = get_or_create_professor(row['CONTROREL_NOME'], row['CONTROREL_COGNOME'])
+
+        if "magistrale" in row['TIPO_CORSO_DESCRIZIONE'].lower():
+            degree = Degree.MASTERS
+        else:
+            degree = Degree.BACHELORS
+
+        entry = CommissionEntry(
+            candidate=student,
+            degree_level=degree,
+            supervisor=professor,
+            supervisor_assistant=professor2,
+            counter_supervisor=counter_supervisor
+        )
+        session.add(entry)
+        commission.entries.append(entry)
+
+    session.flush()
+    return commission.id
+
+
+def writer_ingest(session: Session, rows: list[dict], title: str) -> int:
+    writer = CommissionWriter(session, Commission(title))
+    writer.write([EntryRecord.from_row(row) for row in rows])
+    return writer.commission.id
+
+
+def measure(engine: sa.Engine, ingest, rows: list[dict]) -> tuple[int, float]:
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    session_maker = sessionmaker(bind=engine)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        with session_maker.begin() as session:
+            ingest(session, rows, "Benchmark")
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    return statements, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=600)
+    parser.add_argument("--professors", type=int, default=150)
+    parser.add_argument("--url", default=None, help="Database URL, an empty in-memory SQLite database by default")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.candidates, args.professors)
+    print(f"{args.candidates} candidates, {args.professors} professors")
+    print(f"{'strategy':<10} {'round trips':>12} {'wall time':>12}")
+
+    for name, ingest in (("legacy", legacy_ingest), ("writer", writer_ingest)):
+        # Each strategy starts from an empty database, so both have to create all the professors.
+        engine = sa.create_engine(args.url or "sqlite://")
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+
+        statements, elapsed = measure(engine, ingest, rows)
+        print(f"{name:<10} {statements:>12} {elapsed * 1000:>10.1f}ms")
+
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures how long it takes to build the optimization models, for commissions of increasing size.
+
+Run from the server directory:
+    python -m benchmarks.model_benchmark [--candidates 100 200 400 800] [--professors-ratio 0.25] [--commissions 6]
+
+The data is generated in memory, so only the construction of the Pyomo model is measured. The build time should grow
+linearly with the number of candidates.
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_problem
+from optimization.models import create_max_durata_model, create_min_durata_model
+from optimization.problem import ProblemLimits
+
+
+def measure(create_model, problem, limits, repeat: int) -> tuple[float, int, int]:
+    best = float('inf')
+    model = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model = create_model(problem, limits)
+        best = min(best, time.perf_counter() - start)
+
+    return best, model.nvariables(), model.nconstraints()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs='+', default=[100, 200, 400, 800])
+    parser.add_argument("--professors-ratio", type=float, default=0.25,
+                        help="Number of professors for each candidate")
+    parser.add_argument("--commissions", type=int, default=6, help="Commissions in the morning and in the afternoon")
+    parser.add_argument("--repeat", type=int, default=3, help="The best of this many builds is reported")
+    args = parser.parse_args()
+
+    # Generous limits, the instances don't need to be feasible to be built
+    limits = ProblemLimits(
+        max_duration=210,
+        commissions_morning=args.commissions,
+        commissions_afternoon=args.commissions,
+        min_professors=3,
+        min_professors_masters=5,
+        max_professors=7
+    )
+
+    print(f"{2 * args.commissions} commissions")
+    print(f"{'model':<6} {'candidates':>10} {'professors':>10} {'variables':>10} {'constraints':>12} {'build':>10}")
+    for candidates in args.candidates:
+        professors = max(1, round(candidates * args.professors_ratio))
+        problem = synthetic_problem(candidates, professors)
+
+        for name, create_model in (("max", create_max_durata_model), ("min", create_min_durata_model)):
+            elapsed, variables, constraints = measure(create_model, problem, limits, args.repeat)
+            print(f"{name:<6} {candidates:>10} {professors:>10} {variables:>10} {constraints:>12} "
+                  f"{elapsed * 1000:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures how long it takes to write the optimization model to a file, and how large the file is, for each format and
+with or without symbolic labels.
+
+Run from the server directory:
+    python -m benchmarks.model_dump_benchmark [--candidates 200 800] [--professors-ratio 0.25] [--commissions 6]
+
+The files are written to a temporary directory, that is removed afterwards.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import synthetic_problem
+from optimization.models import create_max_durata_model, dump_model, MODEL_DUMP_FORMATS
+from optimization.problem import ProblemLimits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs='+', default=[200, 800])
+    parser.add_argument("--professors-ratio", type=float, default=0.25,
+                        help="Number of professors for each candidate")
+    parser.add_argument("--commissions", type=int, default=6, help="Commissions in the morning and in the afternoon")
+    args = parser.parse_args()
+
+    limits = ProblemLimits(
+        max_duration=210,
+        commissions_morning=args.commissions,
+        commissions_afternoon=args.commissions
+    )
+
+    print(f"{'candidates':>10} {'format':>6} {'labels':>8} {'write':>10} {'size':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = Path(directory)
+        for candidates in args.candidates:
+            professors = max(1, round(candidates * args.professors_ratio))
+            model = create_max_durata_model(synthetic_problem(candidates, professors), limits)
+
+            for file_format in MODEL_DUMP_FORMATS:
+                for symbolic_labels in (False, True):
+                    start = time.perf_counter()
+                    model_path = dump_model(model, base_path, file_format, symbolic_labels)
+                    elapsed = time.perf_counter() - start
+
+                    size = model_path.stat().st_size
+                    print(f"{candidates:>10} {file_format:>6} {'symbolic' if symbolic_labels else 'numeric':>8} "
+                          f"{elapsed * 1000:>8.1f}ms {size / 1024:>8.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
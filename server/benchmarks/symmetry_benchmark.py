@@ -0,0 +1,92 @@
+"""
+Compares the time the solver needs to prove optimality with each kind of symmetry breaking.
+
+Run from the server directory:
+    python -m benchmarks.symmetry_benchmark [--candidates 40] [--professors 60] [--commissions 4] [--seeds 1 2 3]
+
+The instances are generated in memory, with all the professors always available, and solved with HiGHS through Pyomo's
+appsi interface, so the highspy package must be installed. Instances that hit the time limit are reported with the time
+limit and their gap.
+"""
+import argparse
+import time
+
+import pyomo.environ as pyo
+from pyomo.contrib.appsi.base import TerminationCondition
+from pyomo.contrib.appsi.solvers import Highs
+
+from benchmarks.synthetic import synthetic_problem
+from model import SymmetryBreaking
+from optimization.models import create_max_durata_model, create_min_durata_model
+from optimization.problem import ProblemLimits
+
+
+def solve(model: pyo.ConcreteModel, time_limit: float) -> tuple[float, str, float | None]:
+    solver = Highs()
+    solver.config.time_limit = time_limit
+    solver.config.load_solution = False
+    solver.config.mip_gap = 0
+
+    start = time.perf_counter()
+    results = solver.solve(model)
+    elapsed = time.perf_counter() - start
+
+    gap = None
+    if results.best_feasible_objective is not None and results.best_objective_bound is not None:
+        gap = abs(results.best_feasible_objective - results.best_objective_bound) / \
+              max(1.0, abs(results.best_feasible_objective))
+
+    if results.termination_condition == TerminationCondition.optimal:
+        status = "optimal"
+    elif results.termination_condition == TerminationCondition.maxTimeLimit:
+        status = "time limit"
+    else:
+        status = results.termination_condition.name
+
+    return elapsed, status, gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=40)
+    parser.add_argument("--professors", type=int, default=60)
+    parser.add_argument("--commissions", type=int, default=4, help="Commissions in the morning and in the afternoon")
+    parser.add_argument("--max-duration", type=int, default=210)
+    parser.add_argument("--seeds", type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--online", action="store_true", help="Use the online (min duration) model")
+    args = parser.parse_args()
+
+    create_model = create_min_durata_model if args.online else create_max_durata_model
+
+    print(f"{args.candidates} candidates, {args.professors} professors, {2 * args.commissions} commissions, "
+          f"{'online' if args.online else 'max duration'} model")
+    print(f"{'seed':>4} {'symmetry breaking':<18} {'status':<12} {'time':>10} {'gap':>8}")
+
+    totals = {sb: 0.0 for sb in SymmetryBreaking}
+    for seed in args.seeds:
+        problem = synthetic_problem(args.candidates, args.professors, seed, partial_availability=False)
+
+        for symmetry_breaking in SymmetryBreaking:
+            limits = ProblemLimits(
+                max_duration=args.max_duration,
+                commissions_morning=args.commissions,
+                commissions_afternoon=args.commissions,
+                min_professors=3,
+                min_professors_masters=5,
+                max_professors=args.professors,
+                symmetry_breaking=symmetry_breaking
+            )
+
+            elapsed, status, gap = solve(create_model(problem, limits), args.time_limit)
+            totals[symmetry_breaking] += elapsed
+            gap_str = f"{gap * 100:.2f}%" if gap is not None else "-"
+            print(f"{seed:>4} {symmetry_breaking.value:<18} {status:<12} {elapsed:>9.2f}s {gap_str:>8}")
+
+    print()
+    for symmetry_breaking, total in totals.items():
+        print(f"{'total':>4} {symmetry_breaking.value:<18} {'':<12} {total:>9.2f}s")
+
+
+if __name__ == '__main__':
+    main()
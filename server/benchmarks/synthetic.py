@@ -0,0 +1,77 @@
+import random
+from types import SimpleNamespace
+
+from model import TimeAvailability, UniversityRole
+from optimization.problem import ProblemData
+
+
+def synthetic_rows(candidates: int, professors: int, seed: int = 42) -> list[dict]:
+    """
+    Generates rows shaped like the registrar's graduation list export.
+    About a third of the candidates are master's students, and most of them have a counter-supervisor.
+    """
+    rng = random.Random(seed)
+    names = [(f"Nome{i}", f"Cognome{i}") for i in range(professors)]
+
+    rows = []
+    for i in range(candidates):
+        masters = rng.random() < 0.33
+        supervisor = rng.choice(names)
+        assistant = rng.choice(names) if rng.random() < 0.2 else (None, None)
+        counter_supervisor = rng.choice(names) if masters and rng.random() < 0.8 else (None, None)
+
+        rows.append({
+            'MATRICOLA': 100000 + i,
+            'COGNOME': f"Studente{i}",
+            'NOME': f"Candidato{i}",
+            'CELLULARE': f"333{i:07d}",
+            'EMAIL': f"candidato{i}@example.com",
+            'EMAIL_ATENEO': f"candidato{i}@edu.unito.it",
+            'TIPO_CORSO_DESCRIZIONE': "Laurea Magistrale" if masters else "Laurea",
+            'REL_NOME': supervisor[0],
+            'REL_COGNOME': supervisor[1],
+            'REL2_NOME': assistant[0],
+            'REL2_COGNOME': assistant[1],
+            'CONTROREL_NOME': counter_supervisor[0],
+            'CONTROREL_COGNOME': counter_supervisor[1],
+        })
+
+    return rows
+
+
+def synthetic_problem(candidates: int, professors: int, seed: int = 42, partial_availability: bool = True) \
+        -> ProblemData:
+    """
+    Generates the data of a commission with the same shape as synthetic_rows, without going through the database.
+    The professors get a random role, and most of them are always available.
+    :param partial_availability: Whether some professors are only available in the morning, in the afternoon, or split.
+    A professor can only sit in one commission, so these instances are often infeasible: it is enough for a
+    counter-supervisor to be shared by a morning and an afternoon supervisor.
+    """
+    rng = random.Random(seed)
+    roles = [UniversityRole.ORDINARY, UniversityRole.ASSOCIATE, UniversityRole.RESEARCHER]
+    availabilities = [TimeAvailability.ALWAYS] * 6
+    if partial_availability:
+        availabilities += [TimeAvailability.MORNING, TimeAvailability.AFTERNOON] * 3 + [TimeAvailability.SPLIT] * 2
+    names = [SimpleNamespace(id=i + 1, full_name=f"Cognome{i} Nome{i}", role=rng.choice(roles),
+                             availability=rng.choice(availabilities)) for i in range(professors)]
+
+    # Counter-supervisors are always available, otherwise some candidates could not be assigned to any commission
+    counter_supervisors = [p for p in names if p.availability == TimeAvailability.ALWAYS] or names
+
+    # Stand-ins for the CommissionEntry objects, so that ProblemData applies the same rules as for a real commission
+    entries = []
+    for i in range(candidates):
+        masters = rng.random() < 0.33
+        supervisor = rng.choice(names)
+        counter_supervisor = rng.choice(counter_supervisors) if masters and rng.random() < 0.8 else None
+
+        entries.append(SimpleNamespace(
+            candidate=SimpleNamespace(id=100000 + i, surname=f"Studente{i}", name=f"Candidato{i}"),
+            duration=15 if not masters else 20 if counter_supervisor is None else 30,
+            supervisor_id=supervisor.id,
+            supervisor=supervisor,
+            counter_supervisor=counter_supervisor
+        ))
+
+    return ProblemData.from_commission(SimpleNamespace(id=0, entries=entries))
@@ -0,0 +1,6 @@
+from .records import EntryRecord, ProfessorKey, EXPECTED_COLUMNS
+from .writer import CommissionWriter
+from .readers import RecordReader, MissingColumnsError, UnsupportedFormatError, DEFAULT_BATCH_SIZE
+from .formats import open_reader, READERS
+from .jobs import import_commission, UploadJob, UploadJobRegistry, JobState
+from .delta import apply_delta, CommissionDelta, DuplicateMatriculationError
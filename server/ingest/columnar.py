@@ -0,0 +1,180 @@
+import functools
+from abc import abstractmethod
+from collections.abc import Iterator, Sequence
+from typing import Any, BinaryIO
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv
+import pyarrow.ipc
+import pyarrow.parquet
+
+from ingest.readers import RecordReader, DEFAULT_BATCH_SIZE
+from ingest.records import EntryRecord, EXPECTED_COLUMNS
+from model import Degree
+
+# (name column, surname column) of each professor referenced by an entry
+_PROFESSOR_COLUMNS = (('REL_NOME', 'REL_COGNOME'), ('REL2_NOME', 'REL2_COGNOME'),
+                      ('CONTROREL_NOME', 'CONTROREL_COGNOME'))
+
+
+class ColumnarReader(RecordReader):
+    """
+    Reads the file as Arrow record batches. The degree detection and the checks on the professors' names are computed
+    on whole columns, so the only per-row Python work left is building the records.
+    """
+
+    @abstractmethod
+    def _record_batches(self, batch_size: int) -> Iterator[pa.RecordBatch]:
+        """
+        Yields the data of the file as record batches, in the same column order as the header.
+        """
+
+    def _rows(self) -> Iterator[Sequence[Any]]:
+        # Only needed by the generic implementation of batches(), which is replaced below
+        for batch in self._record_batches(DEFAULT_BATCH_SIZE):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def _column(self, batch: pa.RecordBatch, name: str) -> pa.Array:
+        return batch.column(self.columns.index(name))
+
+    def _strings(self, batch: pa.RecordBatch, name: str) -> pa.Array:
+        # Missing values become 'None', the same value stored by the spreadsheet readers.
+        return pc.fill_null(pc.cast(self._column(batch, name), pa.string()), 'None')
+
+    def _records(self, batch: pa.RecordBatch) -> list[EntryRecord]:
+        # Rows without any of the expected values are empty lines
+        empty = functools.reduce(pc.and_, [pc.is_null(self._column(batch, c)) for c in EXPECTED_COLUMNS])
+        if pc.any(empty).as_py():
+            batch = batch.filter(pc.invert(empty))
+
+        masters = pc.fill_null(
+            pc.match_substring(pc.utf8_lower(self._strings(batch, 'TIPO_CORSO_DESCRIZIONE')), "magistrale"),
+            False
+        ).to_pylist()
+
+        professors = []
+        for name_column, surname_column in _PROFESSOR_COLUMNS:
+            names = self._strings(batch, name_column)
+            surnames = self._strings(batch, surname_column)
+            # Both a name and a surname are required to identify a professor
+            valid = pc.and_(
+                pc.invert(pc.is_in(names, value_set=pa.array(["", "None"]))),
+                pc.invert(pc.is_in(surnames, value_set=pa.array(["", "None"])))
+            ).to_pylist()
+            professors.append([(n, s) if v else None
+                               for n, s, v in zip(names.to_pylist(), surnames.to_pylist(), valid)])
+
+        return [
+            EntryRecord(
+                matriculation_number=matriculation_number,
+                name=name,
+                surname=surname,
+                phone_number=phone_number,
+                personal_email=personal_email,
+                university_email=university_email,
+                degree_level=Degree.MASTERS if is_masters else Degree.BACHELORS,
+                supervisor=supervisor,
+                supervisor_assistant=supervisor_assistant,
+                counter_supervisor=counter_supervisor
+            )
+            for (matriculation_number, name, surname, phone_number, personal_email, university_email, is_masters,
+                 supervisor, supervisor_assistant, counter_supervisor) in zip(
+                pc.cast(self._column(batch, 'MATRICOLA'), pa.int64()).to_pylist(),
+                self._strings(batch, 'NOME').to_pylist(),
+                self._strings(batch, 'COGNOME').to_pylist(),
+                self._strings(batch, 'CELLULARE').to_pylist(),
+                self._strings(batch, 'EMAIL').to_pylist(),
+                self._strings(batch, 'EMAIL_ATENEO').to_pylist(),
+                masters,
+                *professors
+            )
+        ]
+
+    def batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list[EntryRecord]]:
+        try:
+            for batch in self._record_batches(batch_size):
+                # The sources are free to choose the size of their batches, so we slice them to respect batch_size
+                for offset in range(0, batch.num_rows, batch_size):
+                    records = self._records(batch.slice(offset, batch_size))
+                    if len(records) > 0:
+                        yield records
+        finally:
+            self.close()
+
+
+class CsvReader(ColumnarReader):
+    """
+    Streams .csv files with the Arrow CSV reader. Both commas and semicolons are accepted as delimiters.
+    """
+    _reader: pa.csv.CSVStreamingReader | None = None
+
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        header = file.readline().decode('utf-8-sig')
+        file.seek(0)
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        names = [name.strip().strip('"') for name in header.split(delimiter)]
+
+        self._reader = pa.csv.open_csv(
+            file,
+            parse_options=pa.csv.ParseOptions(delimiter=delimiter),
+            # Phone numbers have to stay strings, otherwise leading zeros and prefixes would be lost
+            convert_options=pa.csv.ConvertOptions(column_types={
+                name: pa.string()
+                for name in names if name.upper() in EXPECTED_COLUMNS - {'MATRICOLA'}
+            }, strings_can_be_null=True)
+        )
+        return self._reader.schema.names
+
+    def _record_batches(self, batch_size: int) -> Iterator[pa.RecordBatch]:
+        return iter(self._reader)
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        super().close()
+
+
+class ParquetReader(ColumnarReader):
+    """
+    Reads .parquet files one row group slice at a time.
+    """
+    _file: pa.parquet.ParquetFile | None = None
+
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        self._file = pa.parquet.ParquetFile(file)
+        return self._file.schema_arrow.names
+
+    def _record_batches(self, batch_size: int) -> Iterator[pa.RecordBatch]:
+        return self._file.iter_batches(batch_size=batch_size)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class ArrowReader(ColumnarReader):
+    """
+    Reads Arrow IPC files, both in the random access (file) and in the streaming format.
+    """
+    _reader: pa.ipc.RecordBatchFileReader | pa.ipc.RecordBatchStreamReader | None = None
+
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        try:
+            self._reader = pa.ipc.open_file(file)
+        except pa.ArrowInvalid:
+            file.seek(0)
+            self._reader = pa.ipc.open_stream(file)
+        return self._reader.schema.names
+
+    def _record_batches(self, batch_size: int) -> Iterator[pa.RecordBatch]:
+        if isinstance(self._reader, pa.ipc.RecordBatchFileReader):
+            return (self._reader.get_batch(i) for i in range(self._reader.num_record_batches))
+        return iter(self._reader)
+
+    def close(self):
+        self._reader = None
+        super().close()
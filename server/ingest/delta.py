@@ -0,0 +1,197 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from ingest.readers import RecordReader, DEFAULT_BATCH_SIZE
+from ingest.records import EntryRecord
+from ingest.writer import CommissionWriter
+from model.model import Commission, CommissionEntry, Student, SolutionCommission, SolutionCommissionStudent, \
+    SolutionCommissionProfessor, ExecutionDetails, OptimizationConfiguration
+
+
+class DuplicateMatriculationError(Exception):
+    def __init__(self, matriculation_numbers: Iterable[int]):
+        self.matriculation_numbers = sorted(matriculation_numbers)
+        super().__init__(f"Some matriculation numbers appear more than once: "
+                         f"{', '.join(str(m) for m in self.matriculation_numbers)}")
+
+
+@dataclass
+class CommissionDelta:
+    """
+    The changes applied to a commission by a re-import, as matriculation numbers.
+    """
+    inserted: list[int] = field(default_factory=list)
+    updated: list[int] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+    unchanged: int = 0
+    # The configurations whose solutions have been discarded, as IDs
+    reset_configurations: list[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return len(self.inserted) + len(self.updated) + len(self.deleted) > 0
+
+    def serialize(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'deleted': self.deleted,
+            'unchanged': self.unchanged,
+            'reset_configurations': self.reset_configurations
+        }
+
+
+def _student_values(record: EntryRecord) -> tuple:
+    return (record.name, record.surname, record.phone_number, record.personal_email, record.university_email)
+
+
+def _reset_configurations(session: Session, commission_id: int) -> list[int]:
+    """
+    Discards the solutions and the execution details of the configurations of the commission that have been run, and
+    unlocks them so that they can be solved again. The configurations that are still running don't have execution
+    details yet, the caller must make sure there are none.
+    :return: The IDs of the configurations that have been reset.
+    """
+    config_ids = list(session.scalars(
+        sa.select(ExecutionDetails.opt_config_id).distinct().where(ExecutionDetails.commission_id == commission_id)
+    ))
+    if len(config_ids) == 0:
+        return config_ids
+
+    solution_ids = sa.select(SolutionCommission.id).where(SolutionCommission.opt_config_id.in_(config_ids))
+    for link in (SolutionCommissionStudent, SolutionCommissionProfessor):
+        session.execute(sa.delete(link).where(link.solution_commission_id.in_(solution_ids)))
+    session.execute(sa.delete(SolutionCommission).where(SolutionCommission.opt_config_id.in_(config_ids)))
+    session.execute(sa.delete(ExecutionDetails).where(ExecutionDetails.opt_config_id.in_(config_ids)))
+    session.execute(sa.update(OptimizationConfiguration).where(OptimizationConfiguration.id.in_(config_ids))
+                    .values(run_lock=False))
+    return config_ids
+
+
+def apply_delta(session: Session, commission: Commission, reader: RecordReader) -> CommissionDelta:
+    """
+    Brings the entries of an existing commission in line with an updated file, matching the rows by matriculation
+    number. Only the rows that actually changed are written: new candidates are inserted, the ones that are no longer in
+    the file are deleted, and the modified ones are updated in place with a multi-row upsert on their primary keys.
+    The configurations of the commission are kept, but if the candidates or their degree and professors changed, the
+    solutions computed on the old entries are discarded and the configurations can be solved again.
+    :param session: The session used to write to the database.
+    :param commission: The commission to update.
+    :param reader: The reader of the updated file.
+    :return: The changes that have been applied.
+    """
+    existing = {}
+    duplicates = []
+    for row in session.execute(
+            sa.select(CommissionEntry.id, CommissionEntry.candidate_id, Student.matriculation_number, Student.name,
+                      Student.surname, Student.phone_number, Student.personal_email, Student.university_email,
+                      CommissionEntry.degree_level, CommissionEntry.supervisor_id,
+                      CommissionEntry.supervisor_assistant_id, CommissionEntry.counter_supervisor_id)
+            .join(Student, CommissionEntry.candidate_id == Student.id)
+            .where(CommissionEntry.commission_id == commission.id)
+            .order_by(CommissionEntry.id)
+    ):
+        if row.matriculation_number in existing:
+            # Older uploads could contain the same candidate twice, only the first entry is matched with the file.
+            duplicates.append(row)
+        else:
+            existing[row.matriculation_number] = row
+
+    writer = CommissionWriter(session, commission)
+    delta = CommissionDelta()
+    seen = set()
+    repeated = set()
+    to_insert: list[EntryRecord] = []
+    student_updates = []
+    entry_updates = []
+
+    for batch in reader.batches(DEFAULT_BATCH_SIZE):
+        for record in batch:
+            if record.supervisor is None:
+                raise ValueError(f"The candidate with matriculation number {record.matriculation_number} "
+                                 f"doesn't have a supervisor")
+            if record.matriculation_number in seen:
+                repeated.add(record.matriculation_number)
+            seen.add(record.matriculation_number)
+
+        writer.resolve_professors(batch)
+
+        for record in batch:
+            current = existing.get(record.matriculation_number)
+            if current is None:
+                to_insert.append(record)
+                continue
+
+            entry = (record.degree_level, writer.professor_id(record.supervisor),
+                     writer.professor_id(record.supervisor_assistant), writer.professor_id(record.counter_supervisor))
+            student_changed = _student_values(record) != (current.name, current.surname, current.phone_number,
+                                                          current.personal_email, current.university_email)
+            entry_changed = entry != (current.degree_level, current.supervisor_id, current.supervisor_assistant_id,
+                                      current.counter_supervisor_id)
+
+            if student_changed:
+                student_updates.append({
+                    'id': current.candidate_id,
+                    'matriculation_number': record.matriculation_number,
+                    'name': record.name,
+                    'surname': record.surname,
+                    'phone_number': record.phone_number,
+                    'personal_email': record.personal_email,
+                    'university_email': record.university_email
+                })
+            if entry_changed:
+                entry_updates.append({
+                    'id': current.id,
+                    'commission_id': commission.id,
+                    'candidate_id': current.candidate_id,
+                    'degree_level': entry[0],
+                    'supervisor_id': entry[1],
+                    'supervisor_assistant_id': entry[2],
+                    'counter_supervisor_id': entry[3]
+                })
+
+            if student_changed or entry_changed:
+                delta.updated.append(record.matriculation_number)
+            else:
+                delta.unchanged += 1
+
+    if len(repeated) > 0:
+        raise DuplicateMatriculationError(repeated)
+
+    for offset in range(0, len(to_insert), DEFAULT_BATCH_SIZE):
+        writer.write(to_insert[offset:offset + DEFAULT_BATCH_SIZE])
+    delta.inserted = [r.matriculation_number for r in to_insert]
+
+    # The rows already exist, so the upserts always take the update branch: this gives us a single multi-row statement
+    # for all the updates, instead of one UPDATE per row.
+    for table, rows in ((Student.__table__, student_updates), (CommissionEntry.__table__, entry_updates)):
+        if len(rows) > 0:
+            statement = postgresql.insert(table)
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.id],
+                    set_={name: statement.excluded[name] for name in rows[0] if name != 'id'}
+                ),
+                rows
+            )
+
+    removed = [row for m, row in existing.items() if m not in seen] + duplicates
+    if len(to_insert) + len(entry_updates) + len(removed) > 0:
+        # Changing only the contacts of the students doesn't affect the solutions
+        delta.reset_configurations = _reset_configurations(session, commission.id)
+
+    if len(removed) > 0:
+        student_ids = [row.candidate_id for row in removed]
+        session.execute(sa.delete(SolutionCommissionStudent).where(
+            SolutionCommissionStudent.student_id.in_(student_ids)))
+        session.execute(sa.delete(CommissionEntry).where(CommissionEntry.id.in_([row.id for row in removed])))
+        session.execute(sa.delete(Student).where(Student.id.in_(student_ids)))
+        delta.deleted = [row.matriculation_number for row in removed]
+
+    # The entries have been changed behind the ORM's back
+    session.expire(commission, ['entries', 'optimization_configurations'])
+    return delta
@@ -0,0 +1,29 @@
+from pathlib import PurePath
+from typing import BinaryIO
+
+from ingest.columnar import CsvReader, ParquetReader, ArrowReader
+from ingest.readers import RecordReader, XlsxReader, XlsReader, UnsupportedFormatError
+
+READERS: dict[str, type[RecordReader]] = {
+    '.xlsx': XlsxReader,
+    '.xlsm': XlsxReader,
+    '.xls': XlsReader,
+    '.csv': CsvReader,
+    '.parquet': ParquetReader,
+    '.arrow': ArrowReader,
+    '.arrows': ArrowReader,
+    '.feather': ArrowReader,
+    '.ipc': ArrowReader,
+}
+
+
+def open_reader(file: BinaryIO, filename: str) -> RecordReader:
+    """
+    Opens the reader matching the extension of the uploaded file.
+    :raises UnsupportedFormatError: If there is no reader for the extension.
+    :raises MissingColumnsError: If the file doesn't have all the expected columns.
+    """
+    reader = READERS.get(PurePath(filename).suffix.lower())
+    if reader is None:
+        raise UnsupportedFormatError(filename)
+    return reader(file)
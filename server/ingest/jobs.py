@@ -0,0 +1,145 @@
+import concurrent.futures
+import enum
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from ingest.readers import RecordReader, DEFAULT_BATCH_SIZE
+from ingest.writer import CommissionWriter
+from model.model import Commission
+
+
+def import_commission(session_maker: sessionmaker, reader: RecordReader, title: str,
+                      on_progress: Callable[[int], None] | None = None,
+                      source_hash: str | None = None) -> tuple[int, str]:
+    """
+    Creates a new commission with the records read by the reader, in a single transaction.
+    :param session_maker: The session maker used to open the transaction.
+    :param reader: The reader of the uploaded file.
+    :param title: The title of the new commission.
+    :param on_progress: Called with the total number of rows written after every batch.
+    :param source_hash: The hash of the uploaded file.
+    :return: The ID and the title of the new commission.
+    """
+    session: Session
+    # Automatically commit the transaction if no exception is raised
+    with session_maker.begin() as session:
+        writer = CommissionWriter(session, Commission(title, source_hash))
+        for batch in reader.batches(DEFAULT_BATCH_SIZE):
+            writer.write(batch)
+            if on_progress is not None:
+                on_progress(writer.rows_written)
+
+        return writer.commission.id, writer.commission.title
+
+
+class JobState(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class UploadJob:
+    title: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    state: JobState = JobState.QUEUED
+    rows_processed: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    commission_id: int | None = None
+    error: str | None = None
+
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.started_at is None:
+            return None
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.rows_processed / elapsed if elapsed > 0 else None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (JobState.COMPLETED, JobState.FAILED)
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'state': self.state.value,
+            'rows_processed': self.rows_processed,
+            'rows_per_second': self.rows_per_second,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'commission': {
+                'id': self.commission_id,
+                'title': self.title
+            } if self.commission_id is not None else None,
+            'error': self.error
+        }
+
+
+class UploadJobRegistry:
+    """
+    Runs the imports of uploaded files in a thread pool, keeping track of their progress.
+    The jobs are kept in memory, and the finished ones are forgotten after retention seconds.
+    """
+    logger: logging.Logger
+
+    def __init__(self, session_maker: sessionmaker, max_workers: int, logger: logging.Logger,
+                 retention: float = 3600):
+        self._session_maker = session_maker
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="upload")
+        self._jobs: dict[str, UploadJob] = {}
+        self._lock = threading.Lock()
+        self._retention = retention
+        self.logger = logger
+
+    def submit(self, reader: RecordReader, title: str, source_hash: str | None = None) -> UploadJob:
+        job = UploadJob(title)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, reader, source_hash)
+        return job
+
+    def get(self, job_id: str) -> UploadJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: UploadJob, reader: RecordReader, source_hash: str | None):
+        job.state = JobState.RUNNING
+        job.started_at = time.time()
+        self.logger.info(f"Upload job {job.id} started")
+
+        def on_progress(rows: int):
+            job.rows_processed = rows
+
+        try:
+            job.commission_id, job.title = import_commission(self._session_maker, reader, job.title, on_progress,
+                                                             source_hash)
+            job.state = JobState.COMPLETED
+            self.logger.info(f"Upload job {job.id} completed: {job.rows_processed} rows, "
+                             f"commission {job.commission_id}")
+        except Exception as e:
+            job.error = str(e)
+            job.state = JobState.FAILED
+            self.logger.exception(f"Upload job {job.id} failed", exc_info=e)
+        finally:
+            # The reader is already closed if all its rows have been read, but the import can fail before that
+            reader.close()
+            job.finished_at = time.time()
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and now - job.finished_at > self._retention]
+        for job_id in expired:
+            del self._jobs[job_id]
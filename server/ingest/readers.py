@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from typing import Any, BinaryIO
+
+import openpyxl
+import xlrd
+
+from ingest.records import EntryRecord, EXPECTED_COLUMNS
+
+# How many records are handed to the database writer at once.
+DEFAULT_BATCH_SIZE = 500
+
+
+class MissingColumnsError(Exception):
+    def __init__(self, missing_columns: set[str]):
+        super().__init__(f"Some expected columns are missing: {', '.join(sorted(missing_columns))}")
+        self.missing_columns = sorted(missing_columns)
+
+
+class UnsupportedFormatError(Exception):
+    def __init__(self, filename: str):
+        super().__init__(f"Unsupported file format: {filename}")
+        self.filename = filename
+
+
+class RecordReader(ABC):
+    """
+    Reads the rows of an uploaded file as typed records, without loading the whole file in memory.
+
+    The header is read and validated against the expected columns when the reader is created, so that a file with
+    missing columns is rejected before anything is written to the database.
+    """
+    columns: list[str]
+
+    def __init__(self, file: BinaryIO):
+        # The reader owns the file from now on, and closes it with close()
+        self._source = file
+        self.columns = [str(c).strip().upper() if c is not None else "" for c in self._open(file)]
+
+        missing_columns = EXPECTED_COLUMNS - set(self.columns)
+        if len(missing_columns) > 0:
+            self.close()
+            raise MissingColumnsError(missing_columns)
+
+    @abstractmethod
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        """
+        Opens the file and returns the header row.
+        """
+
+    @abstractmethod
+    def _rows(self) -> Iterator[Sequence[Any]]:
+        """
+        Yields the values of the data rows, in the same order as the header.
+        """
+
+    def close(self):
+        """
+        Releases the resources of the reader and closes the file. The readers call it when all the rows have been read.
+        """
+        self._source.close()
+
+    def batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list[EntryRecord]]:
+        """
+        Yields the records of the file in batches of at most batch_size elements. Empty rows are skipped.
+        """
+        batch = []
+        try:
+            for values in self._rows():
+                if all(v is None for v in values):
+                    continue
+                if len(values) < len(self.columns):
+                    values = (*values, *[None] * (len(self.columns) - len(values)))
+
+                batch.append(EntryRecord.from_row(dict(zip(self.columns, values))))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+            if len(batch) > 0:
+                yield batch
+        finally:
+            self.close()
+
+
+class XlsxReader(RecordReader):
+    """
+    Streams .xlsx files with openpyxl in read-only mode.
+    """
+    _workbook: openpyxl.Workbook | None = None
+
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        self._workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        self._sheet_rows = self._workbook.worksheets[0].iter_rows(values_only=True)
+        return next(self._sheet_rows, ())
+
+    def _rows(self) -> Iterator[Sequence[Any]]:
+        return self._sheet_rows
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        super().close()
+
+
+class XlsReader(RecordReader):
+    """
+    Reads legacy .xls files with xlrd, loading the sheets on demand.
+    """
+    _workbook: xlrd.Book | None = None
+
+    def _open(self, file: BinaryIO) -> Sequence[Any]:
+        self._workbook = xlrd.open_workbook(file_contents=file.read(), on_demand=True)
+        self._sheet = self._workbook.sheet_by_index(0)
+        return self._row(0) if self._sheet.nrows > 0 else ()
+
+    def _row(self, index: int) -> list[Any]:
+        # Empty cells are read as empty strings by xlrd, we want them to be missing values like in the other formats.
+        return [None if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK) else cell.value
+                for cell in self._sheet.row(index)]
+
+    def _rows(self) -> Iterator[Sequence[Any]]:
+        for index in range(1, self._sheet.nrows):
+            yield self._row(index)
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.release_resources()
+            self._workbook = None
+        super().close()
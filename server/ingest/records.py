@@ -0,0 +1,81 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from model import Degree
+
+# A professor is identified in the spreadsheets only by its name and surname.
+ProfessorKey = tuple[str, str]
+
+# The columns that every uploaded file must contain.
+EXPECTED_COLUMNS = frozenset({'MATRICOLA', 'COGNOME', 'NOME', 'CELLULARE', 'EMAIL', 'EMAIL_ATENEO',
+                              'TIPO_CORSO_DESCRIZIONE', 'REL_COGNOME', 'REL_NOME', 'REL2_COGNOME', 'REL2_NOME',
+                              'CONTROREL_COGNOME', 'CONTROREL_NOME'})
+
+
+def text(value: Any) -> str:
+    """
+    Converts a spreadsheet cell to the string stored in the database.
+    Missing cells become 'None', like the original pandas based import did with fillna('None').
+    Integral floats (phone numbers are often read as floats) lose the trailing '.0'.
+    """
+    if value is None:
+        return 'None'
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return 'None'
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def professor_key(name: Any, surname: Any) -> ProfessorKey | None:
+    """
+    Builds the key used to identify a professor. If either the name or surname is missing, None is returned, because
+    both a name and a surname are required to identify a professor.
+    """
+    name, surname = text(name), text(surname)
+    if name in ("", "None") or surname in ("", "None"):
+        return None
+    return name, surname
+
+
+@dataclass(frozen=True, slots=True)
+class EntryRecord:
+    """
+    A typed row of an uploaded file: one candidate with its degree level and the keys of its professors.
+    """
+    matriculation_number: int
+    name: str
+    surname: str
+    phone_number: str
+    personal_email: str
+    university_email: str
+    degree_level: Degree
+    supervisor: ProfessorKey | None
+    supervisor_assistant: ProfessorKey | None
+    counter_supervisor: ProfessorKey | None
+
+    @staticmethod
+    def from_row(row: Mapping[str, Any]) -> 'EntryRecord':
+        # lowercase contains "magistrale" then it's a master degree
+        if "magistrale" in text(row['TIPO_CORSO_DESCRIZIONE']).lower():
+            degree = Degree.MASTERS
+        else:
+            degree = Degree.BACHELORS
+
+        return EntryRecord(
+            matriculation_number=int(row['MATRICOLA']),
+            name=text(row['NOME']),
+            surname=text(row['COGNOME']),
+            phone_number=text(row['CELLULARE']),
+            personal_email=text(row['EMAIL']),
+            university_email=text(row['EMAIL_ATENEO']),
+            degree_level=degree,
+            supervisor=professor_key(row['REL_NOME'], row['REL_COGNOME']),
+            supervisor_assistant=professor_key(row['REL2_NOME'], row['REL2_COGNOME']),
+            counter_supervisor=professor_key(row['CONTROREL_NOME'], row['CONTROREL_COGNOME'])
+        )
+
+    def professor_keys(self) -> list[ProfessorKey]:
+        return [k for k in (self.supervisor, self.supervisor_assistant, self.counter_supervisor) if k is not None]
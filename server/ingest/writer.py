@@ -0,0 +1,161 @@
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from ingest.records import EntryRecord, ProfessorKey
+from model import UniversityRole, TimeAvailability
+from model.model import Commission, CommissionEntry, Professor, Student
+
+_STUDENT_COLUMNS = ('matriculation_number', 'name', 'surname', 'phone_number', 'personal_email', 'university_email')
+
+
+class CommissionWriter:
+    """
+    Writes the entries of a commission to the database using set-based statements.
+
+    The professors referenced by a batch of records are resolved with a single query into an in-memory
+    (name, surname) index, the missing ones are created with a single bulk insert, and the students and commission
+    entries are written with multi-row INSERT ... RETURNING statements. The number of round trips to the database
+    depends on the number of batches, not on the number of rows.
+    """
+    session: Session
+    commission: Commission
+    rows_written: int
+
+    def __init__(self, session: Session, commission: Commission):
+        """
+        :param session: The session used to write to the database.
+        :param commission: The commission the entries are added to. If it is new, it is added to the session.
+        """
+        self.session = session
+        self.commission = commission
+        self.rows_written = 0
+        self._professors: dict[ProfessorKey, int] = {}
+
+        if commission.id is None:
+            session.add(commission)
+            # needed to actually have the database generate the ID
+            session.flush()
+
+    def write(self, records: Sequence[EntryRecord]) -> int:
+        """
+        Writes a batch of records to the commission.
+        :param records: The records to write.
+        :return: The number of rows written.
+        """
+        if len(records) == 0:
+            return 0
+
+        for record in records:
+            if record.supervisor is None:
+                raise ValueError(f"The candidate with matriculation number {record.matriculation_number} "
+                                 f"doesn't have a supervisor")
+
+        self.resolve_professors(records)
+
+        return self._insert_entries([{
+            'matriculation_number': r.matriculation_number,
+            'name': r.name,
+            'surname': r.surname,
+            'phone_number': r.phone_number,
+            'personal_email': r.personal_email,
+            'university_email': r.university_email,
+            'degree_level': r.degree_level,
+            'supervisor_id': self.professor_id(r.supervisor),
+            'supervisor_assistant_id': self.professor_id(r.supervisor_assistant),
+            'counter_supervisor_id': self.professor_id(r.counter_supervisor)
+        } for r in records])
+
+    def copy_entries(self, source_commission_id: int) -> int:
+        """
+        Copies the entries of another commission, creating new students for them. The professors are shared.
+        This is a cheap alternative to importing the same file twice: the file isn't parsed, and the professors don't
+        have to be resolved again.
+        :param source_commission_id: The ID of the commission to copy the entries from.
+        :return: The number of rows written.
+        """
+        rows = self.session.execute(
+            sa.select(Student.matriculation_number, Student.name, Student.surname, Student.phone_number,
+                      Student.personal_email, Student.university_email, CommissionEntry.degree_level,
+                      CommissionEntry.supervisor_id, CommissionEntry.supervisor_assistant_id,
+                      CommissionEntry.counter_supervisor_id)
+            .join(CommissionEntry, CommissionEntry.candidate_id == Student.id)
+            .where(CommissionEntry.commission_id == source_commission_id)
+            .order_by(CommissionEntry.id)
+        ).all()
+
+        return self._insert_entries([r._mapping for r in rows])
+
+    def _insert_entries(self, rows: Sequence[Mapping[str, Any]]) -> int:
+        """
+        Inserts a student and a commission entry for each row. The professors must already be resolved.
+        :param rows: The values of the columns of the student, together with degree_level, supervisor_id,
+        supervisor_assistant_id and counter_supervisor_id.
+        :return: The number of rows written.
+        """
+        if len(rows) == 0:
+            return 0
+
+        # The statements target the tables rather than the mapped classes: the ORM bulk insert splits the rows in a new
+        # batch every time the set of non-null columns changes, which happens almost on every row for the entries.
+        students = Student.__table__
+        student_ids = self.session.scalars(
+            sa.insert(students).returning(students.c.id, sort_by_parameter_order=True),
+            [{column: r[column] for column in _STUDENT_COLUMNS} for r in rows]
+        ).all()
+
+        self.session.execute(
+            sa.insert(CommissionEntry.__table__),
+            [{
+                'commission_id': self.commission.id,
+                'candidate_id': student_id,
+                'degree_level': r['degree_level'],
+                'supervisor_id': r['supervisor_id'],
+                'supervisor_assistant_id': r['supervisor_assistant_id'],
+                'counter_supervisor_id': r['counter_supervisor_id']
+            } for r, student_id in zip(rows, student_ids)]
+        )
+
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def professor_id(self, key: ProfessorKey | None) -> int | None:
+        return self._professors[key] if key is not None else None
+
+    def resolve_professors(self, records: Sequence[EntryRecord]):
+        """
+        Adds to the index all the professors referenced by the records, creating the ones that don't exist yet.
+        New professors get an unspecified role, as they did when they were created one at a time.
+        """
+        missing = {key for r in records for key in r.professor_keys() if key not in self._professors}
+        if len(missing) == 0:
+            return
+
+        existing = self.session.execute(
+            sa.select(Professor.id, Professor.name, Professor.surname)
+            .where(sa.tuple_(Professor.name, Professor.surname).in_(list(missing)))
+            .order_by(Professor.id)
+        )
+        for pid, name, surname in existing:
+            # If there are homonyms we keep the oldest professor
+            self._professors.setdefault((name, surname), pid)
+
+        to_create = sorted(missing - self._professors.keys())
+        if len(to_create) == 0:
+            return
+
+        professors = Professor.__table__
+        created = self.session.execute(
+            sa.insert(professors).returning(professors.c.id, professors.c.name, professors.c.surname,
+                                            sort_by_parameter_order=True),
+            [{
+                'name': name,
+                'surname': surname,
+                'role': UniversityRole.UNSPECIFIED,
+                'availability': TimeAvailability.ALWAYS
+            } for name, surname in to_create]
+        )
+        for pid, name, surname in created:
+            self._professors[(name, surname)] = pid
@@ -0,0 +1,26 @@
+"""Execution details solver
+
+Revision ID: 5d0e9b3f7a12
+Revises: c4a7e2d91f08
+Create Date: 2026-10-17 21:14:05.512907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0e9b3f7a12'
+down_revision: Union[str, None] = 'c4a7e2d91f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('execution_details', sa.Column('solver', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('execution_details', 'solver')
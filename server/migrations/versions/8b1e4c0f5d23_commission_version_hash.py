@@ -0,0 +1,30 @@
+"""Commission version hash
+
+Revision ID: 8b1e4c0f5d23
+Revises: 3f9c2d7a1b64
+Create Date: 2026-10-17 15:40:08.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4c0f5d23'
+down_revision: Union[str, None] = '3f9c2d7a1b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('commissions', sa.Column('version_hash', sa.String(length=64), nullable=True))
+    # The existing commissions just need a starting version, any unique value will do.
+    op.execute("update commissions "
+               "set version_hash = encode(sha256(convert_to(id::text || clock_timestamp()::text, 'UTF8')), 'hex')")
+    op.alter_column('commissions', 'version_hash', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('commissions', 'version_hash')
@@ -0,0 +1,27 @@
+"""Solution commissions version hash index
+
+Revision ID: 9e3b71c40d58
+Revises: 5d0e9b3f7a12
+Create Date: 2026-10-17 23:02:37.604125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3b71c40d58'
+down_revision: Union[str, None] = '5d0e9b3f7a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_solution_commissions_version_hash'), 'solution_commissions', ['version_hash'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solution_commissions_version_hash'), table_name='solution_commissions')
@@ -0,0 +1,27 @@
+"""Configuration symmetry breaking
+
+Revision ID: c4a7e2d91f08
+Revises: 8b1e4c0f5d23
+Create Date: 2026-10-17 18:02:44.190318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d91f08'
+down_revision: Union[str, None] = '8b1e4c0f5d23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('optimization_configurations',
+                  sa.Column('symmetry_breaking', sa.String(), server_default='none', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('optimization_configurations', 'symmetry_breaking')
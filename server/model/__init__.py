@@ -1,3 +1,3 @@
 from .hashable import Hashable
-from .enums import Degree, UniversityRole, TimeAvailability, SolverEnum
+from .enums import Degree, UniversityRole, TimeAvailability, SolverEnum, SymmetryBreaking
 from .string_enum import StringEnum
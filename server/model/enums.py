@@ -54,6 +54,45 @@ class SolverEnum(Hashable, enum.Enum):
     CPLEX = 'cplex'
     GLPK = 'glpk'
     GUROBI = 'gurobi'
+    HIGHS = 'highs'
+    CBC = 'cbc'
+    # Simulated annealing, it doesn't need any external solver
+    HEURISTIC = 'heuristic'
+    # Races all the available solvers and keeps the best solution
+    PORTFOLIO = 'portfolio'
+
+    @staticmethod
+    def mip_solvers() -> list['SolverEnum']:
+        return [SolverEnum.HIGHS, SolverEnum.GUROBI, SolverEnum.CPLEX, SolverEnum.CBC, SolverEnum.GLPK]
+
+    @property
+    def in_memory(self) -> bool:
+        """
+        Whether the solver is a library driven in memory through its APPSI interface, instead of an executable that
+        reads the model from a file.
+        """
+        return self in [SolverEnum.HIGHS]
+
+    @property
+    def factory_name(self) -> str:
+        return f'appsi_{self.value}' if self.in_memory else self.value
+
+    def hash(self):
+        return Hashable.hash_data(self.value)
+
+
+class SymmetryBreaking(Hashable, enum.Enum):
+    """
+    How the optimization models tell apart the commissions of the same part of the day, that are otherwise
+    interchangeable.
+    """
+    NONE = 'none'
+    # The commissions are used in order
+    USAGE = 'usage'
+    # The commissions are ordered by decreasing duration
+    DURATION = 'duration'
+    # The professors with the most candidates can only sit in the first commissions
+    ANCHOR = 'anchor'
 
     def hash(self):
         return Hashable.hash_data(self.value)
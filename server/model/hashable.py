@@ -11,3 +11,13 @@ class Hashable:
         if not isinstance(data, bytes):
             data = repr(data).encode('utf-8')
         return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def hash_stream(stream, chunk_size: int = 64 * 1024) -> str:
+        # Same result as hash_data on the bytes of the stream, without having to hold them all in memory.
+        # The stream is rewound afterwards, so that it can still be read.
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
@@ -1,20 +1,26 @@
 import logging
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, replace
 from datetime import datetime
+from collections.abc import Collection
 from typing import List
 from pathlib import Path
 from zoneinfo import available_timezones
 
-import pandas as pd
 import sqlalchemy as sa
-from pyomo.core import AbstractModel
+from pyomo.core import ConcreteModel
 from pyomo.opt import SolverFactory, SolverStatus, TerminationCondition, SolverResults
 from sqlalchemy import Column, ForeignKey
-from sqlalchemy.orm import relationship, registry, declarative_base, Mapped, mapped_column
+from sqlalchemy.orm import relationship, registry, declarative_base, Mapped, mapped_column, selectinload, joinedload, \
+    defer
 from watchdog.observers import Observer
 
+import optimization.heuristic
 import optimization.models
-from model import Degree, UniversityRole, SolverEnum, Hashable, StringEnum, TimeAvailability
+import optimization.portfolio
+from optimization.portfolio import SolverRun
+from optimization.problem import ProblemData, ProblemLimits
+from model import Degree, UniversityRole, SolverEnum, Hashable, StringEnum, TimeAvailability, SymmetryBreaking
 from session_maker import SessionMakerSingleton
 
 from utils import FileChangeHandler
@@ -24,6 +30,8 @@ from utils import FileChangeHandler
 
 Base = declarative_base()
 
+CPLEX_EXECUTABLE = "/opt/ibm/ILOG/CPLEX_Studio128/cplex/bin/x86-64_linux/cplex"
+
 
 # The annotation is needed to avoid having to declare a boilerplate class...
 # https://docs.sqlalchemy.org/en/20/orm/declarative_styles.html#declarative-mapping-using-a-decorator-no-declarative-base
@@ -81,8 +89,9 @@ class Professor(Base, Hashable):
     surname = mapped_column(sa.String(128), nullable=False)
     role: Mapped[UniversityRole] = mapped_column(sa.Enum(UniversityRole), nullable=False,
                                                  default=UniversityRole.UNSPECIFIED)
-    availability: Mapped[TimeAvailability] = mapped_column(sa.Enum(TimeAvailability), nullable=False,
-                                                           default=TimeAvailability.ALWAYS)
+    # The name has to match the type created by the migration, otherwise statements that cast to the enum type fail.
+    availability: Mapped[TimeAvailability] = mapped_column(sa.Enum(TimeAvailability, name='time_availability'),
+                                                           nullable=False, default=TimeAvailability.ALWAYS)
 
     def __init__(self, name: str, surname: str, role: UniversityRole = UniversityRole.UNSPECIFIED,
                  availability=TimeAvailability.ALWAYS):
@@ -118,6 +127,10 @@ class Commission(Base, Hashable):
 
     id = mapped_column(sa.Integer, primary_key=True, autoincrement=True, nullable=False)
     title = mapped_column(sa.String(256), nullable=False)
+    # Hash of the uploaded file the commission was created from, used to recognize re-uploads of the same file.
+    source_hash: Mapped[str | None] = mapped_column(sa.String(64), nullable=True, index=True)
+    # Changes every time the commission, or anything that is sent along with it, is modified. Used for the ETags.
+    version_hash: Mapped[str] = mapped_column(sa.String(64), nullable=False)
     entries: Mapped[List['CommissionEntry']] = relationship(
         "CommissionEntry",
         back_populates="commission",
@@ -129,9 +142,11 @@ class Commission(Base, Hashable):
         cascade="all, delete-orphan"
     )
 
-    def __init__(self, title: str):
+    def __init__(self, title: str, source_hash: str | None = None):
         super().__init__()
         self.title = title
+        self.source_hash = source_hash
+        self.version_hash = Hashable.hash_data(uuid.uuid4().hex)
         self.entries = []
 
     def serialize(self):
@@ -142,87 +157,94 @@ class Commission(Base, Hashable):
             'optimization_configurations': [conf.serialize() for conf in self.optimization_configurations]
         }
 
-    def export_xls(self, base_path: Path):
-        xls_path = base_path / "val.xls"
-
-        def si_no(yes: bool) -> str:
-            return 'SI' if yes else 'NO'
-
-        # There is a specific possibility that has been intentionally omitted:
-        # It might happen that we have a professor that has to be split, however he/she also is a counter-supervisor.
-        # This could cause the problem to be unsolvable.
-        # A better solution has to be discussed.
-        students_by_professor: dict[Professor, list[CommissionEntry]] = {}
-        for entry in self.entries:
-            p = entry.supervisor
-            if p not in students_by_professor:
-                students_by_professor[p] = []
-
-            students_by_professor[p].append(entry)
-
-        entries = []
-
-        for p in students_by_professor:
-            pe = students_by_professor[p]
-            should_split = p.availability == TimeAvailability.SPLIT
-
-            for index, entry, in enumerate(pe):
-                morning_supervisor_availability: bool
-                afternoon_supervisor_availability: bool
-
-                supervisor = entry.supervisor
-
-                if should_split:
-                    if index <= (len(pe) / 2):
-                        morning_supervisor_availability = True
-                        afternoon_supervisor_availability = False
-                    else:
-                        morning_supervisor_availability = False
-                        afternoon_supervisor_availability = True
-                else:
-                    morning_supervisor_availability = supervisor.availability.available_morning
-                    afternoon_supervisor_availability = supervisor.availability.available_afternoon
-
-                try:
-                    supervisor = entry.supervisor
-                    entity = [
-                        entry.candidate.id,
-                        entry.candidate.surname,
-                        entry.candidate.name,
-                        entry.duration,
-                        supervisor.id,
-                        supervisor.full_name,
-                        supervisor.role.abbr,
-                        si_no(morning_supervisor_availability),  # mattina
-                        si_no(afternoon_supervisor_availability)  # pomeriggio
-                    ]
-                except ValueError as e:
-                    raise ValueError(f"Professor '{entry.supervisor.full_name}' doesn't have a role") from e
-
-                if entry.counter_supervisor is not None:
-                    cs = entry.counter_supervisor
-                    try:
-                        entity.extend([
-                            cs.id,
-                            cs.full_name,
-                            cs.role.abbr,
-                            si_no(cs.availability.available_morning),  # mattina
-                            si_no(cs.availability.available_afternoon)  # pomeriggio
-                        ])
-                    except ValueError as e:
-                        raise ValueError(f"Professor '{entry.counter_supervisor.full_name}' doesn't have a role") from e
-
-                # todo do the same for the supervisor assistant
-
-                entries.append(entity)
-
-        df = pd.DataFrame(
-            entries,
-            columns=["ID_Studente", "Cognome", "Nome", "Durata", "ID_Relatore", "Relatore", "Ruolo", "Mattina",
-                     "Pomeriggio", "ID_Controrelatore", "Controrelatore", "Ruolo", "Mattina", "Pomeriggio"]
+    def bump_version(self):
+        """
+        Marks the commission as modified. Computing the Merkle hash of the whole commission would mean loading all of
+        its entries and configurations, so the new version is instead chained on the previous one with a random nonce.
+        """
+        self.version_hash = Hashable.hash_data(f"{self.version_hash}{uuid.uuid4().hex}")
+
+    @staticmethod
+    def bump_versions(session: sa.orm.Session, commission_ids: Collection[int]):
+        """
+        Marks as modified all the commissions with the given IDs.
+        """
+        if len(commission_ids) == 0:
+            return
+        for commission in session.query(Commission).filter(Commission.id.in_(commission_ids)):
+            commission.bump_version()
+
+    @staticmethod
+    def full_load_options():
+        """
+        Loader options that fetch everything serialize() needs with a fixed number of queries, regardless of the number
+        of entries and configurations. Each collection is loaded with an IN query on the parents' keys, while the
+        candidate and the professors of each entry are joined to the entries' query.
+        """
+        return (
+            selectinload(Commission.entries).options(*CommissionEntry.load_options()),
+            selectinload(Commission.optimization_configurations).options(*OptimizationConfiguration.load_options())
         )
 
-        df.to_excel(xls_path, index=False)
+    @staticmethod
+    def summaries(session: sa.orm.Session) -> list[dict]:
+        """
+        Summarizes all the commissions with a single aggregate query, without loading their entries or configurations.
+        The last run is the most recent execution of any of the configurations of the commission.
+        """
+        entries_count = (
+            sa.select(sa.func.count(CommissionEntry.id))
+            .where(CommissionEntry.commission_id == Commission.id)
+            .scalar_subquery()
+        )
+        configurations_count = (
+            sa.select(sa.func.count(OptimizationConfiguration.id))
+            .where(OptimizationConfiguration.commission_id == Commission.id)
+            .scalar_subquery()
+        )
+        runs = sa.select(
+            ExecutionDetails.commission_id,
+            ExecutionDetails.start_time,
+            ExecutionDetails.end_time,
+            ExecutionDetails.success,
+            sa.func.row_number().over(
+                partition_by=ExecutionDetails.commission_id,
+                order_by=(ExecutionDetails.start_time.desc(), ExecutionDetails.id.desc())
+            ).label('position')
+        ).subquery()
+
+        rows = session.execute(
+            sa.select(Commission.id, Commission.title, entries_count.label('entries_count'),
+                      configurations_count.label('configurations_count'), runs.c.start_time, runs.c.end_time,
+                      runs.c.success)
+            .outerjoin(runs, sa.and_(runs.c.commission_id == Commission.id, runs.c.position == 1))
+            .order_by(Commission.id)
+        )
+
+        def run_state(row) -> str | None:
+            if row.start_time is None:
+                return None
+            if row.end_time is None:
+                return 'running'
+            return 'succeeded' if row.success else 'failed'
+
+        return [{
+            'id': row.id,
+            'title': row.title,
+            'entries_count': row.entries_count,
+            'configurations_count': row.configurations_count,
+            'last_run': {
+                'state': run_state(row),
+                'start_time': row.start_time,
+                'end_time': row.end_time
+            } if row.start_time is not None else None
+        } for row in rows]
+
+    def export_xls(self, base_path: Path):
+        """
+        Writes the data used by the optimization models to a spreadsheet, for debugging purposes.
+        """
+        return ProblemData.from_commission(self).export_xls(base_path)
 
     def __repr__(self):
         return f"Commission({self.id=}, {self.title=}, {self.entries=})"
@@ -274,16 +296,54 @@ class CommissionEntry(Base, Hashable):
         self.supervisor_assistant = supervisor_assistant
         self.counter_supervisor = counter_supervisor
 
-    def serialize(self):
-        return {
+    # The fields that can be selected when serializing an entry, besides the IDs that are always present
+    FIELDS = ('candidate', 'degree_level', 'supervisor', 'supervisor_assistant', 'counter_supervisor')
+
+    def serialize(self, fields: Collection[str] = FIELDS, normalized: bool = False):
+        """
+        :param fields: The fields to include.
+        :param normalized: If set, the candidate and the professors are referenced by ID instead of being embedded.
+        """
+        serialized = {
             'id': self.id,
-            'commission_id': self.commission_id,
-            'candidate': self.candidate.serialize(),
-            'degree_level': self.degree_level.value,
-            'supervisor': self.supervisor.serialize(),
-            'supervisor_assistant': self.supervisor_assistant.serialize() if self.supervisor_assistant else None,
-            'counter_supervisor': self.counter_supervisor.serialize() if self.counter_supervisor else None
+            'commission_id': self.commission_id
         }
+        if normalized:
+            for field in fields:
+                if field == 'degree_level':
+                    serialized['degree_level'] = self.degree_level.value
+                else:
+                    serialized[f"{field}_id"] = getattr(self, f"{field}_id")
+            return serialized
+
+        if 'candidate' in fields:
+            serialized['candidate'] = self.candidate.serialize()
+        if 'degree_level' in fields:
+            serialized['degree_level'] = self.degree_level.value
+        if 'supervisor' in fields:
+            serialized['supervisor'] = self.supervisor.serialize()
+        if 'supervisor_assistant' in fields:
+            serialized['supervisor_assistant'] = \
+                self.supervisor_assistant.serialize() if self.supervisor_assistant else None
+        if 'counter_supervisor' in fields:
+            serialized['counter_supervisor'] = self.counter_supervisor.serialize() if self.counter_supervisor else None
+        return serialized
+
+    @staticmethod
+    def load_options(fields: Collection[str] = FIELDS, normalized: bool = False):
+        """
+        Loader options that join to the entries' query the related objects needed to serialize the given fields.
+        The normalized serialization only needs the foreign keys, so nothing is joined.
+        """
+        if normalized:
+            return ()
+        relationships = {
+            'candidate': CommissionEntry.candidate,
+            'supervisor': CommissionEntry.supervisor,
+            'supervisor_assistant': CommissionEntry.supervisor_assistant,
+            'counter_supervisor': CommissionEntry.counter_supervisor
+        }
+        return tuple(joinedload(relationship) for field, relationship in relationships.items() if field in fields)
 
     @property
     def duration(self):
@@ -323,6 +383,9 @@ class OptimizationConfiguration(Base, Hashable):
                                                server_default=SolverEnum.CPLEX.value)
     optimization_time_limit = mapped_column(sa.Integer, nullable=False, server_default='60', default=60)
     optimization_gap = mapped_column(sa.Float, nullable=False, server_default='0.005', default=0.005)
+    symmetry_breaking: Mapped[SymmetryBreaking] = mapped_column(StringEnum(SymmetryBreaking), nullable=False,
+                                                                default=SymmetryBreaking.NONE,
+                                                                server_default=SymmetryBreaking.NONE.value)
 
     run_lock = mapped_column(sa.Boolean, nullable=False, server_default='False', default=False)
 
@@ -343,38 +406,34 @@ class OptimizationConfiguration(Base, Hashable):
         self.commission_id = commission_id
         self.title = title
 
-    def create_dat_file(self, base_path: Path) -> (Path, Path):
-        dat_file = base_path / "temp.dat"
-        excel_path = base_path / "val.xls"
-
-        base_path.mkdir(parents=True, exist_ok=True)
-
-        morning_commissions = list(range(0, self.max_commissions_morning))
-        afternoon_commissions = list(range(
-            self.max_commissions_morning,
-            self.max_commissions_morning + self.max_commissions_afternoon
-        ))
-
-        with open(dat_file, "w") as f:
-            f.write(f"param max_durata := {self.max_duration};\n")
-            f.write(f"set commissioni_mattina := {' '.join(map(str, morning_commissions))};\n")
-            f.write(f"set commissioni_pomeriggio := {' '.join(map(str, afternoon_commissions))};\n")
-            f.write(f"param excel_path := \"{excel_path.resolve()}\";\n")
-
-            if self.online:
-                f.write(f"param minDocenti := {self.min_professor_number};\n")
-                f.write(f"param minDocentiMag := {self.min_professor_number_masters};\n")
-                f.write(f"param max_doc := {self.max_professor_numer};\n")
+    def problem_limits(self) -> ProblemLimits:
+        return ProblemLimits(
+            max_duration=self.max_duration,
+            commissions_morning=self.max_commissions_morning,
+            commissions_afternoon=self.max_commissions_afternoon,
+            min_professors=self.min_professor_number if self.online else None,
+            min_professors_masters=self.min_professor_number_masters if self.online else None,
+            max_professors=self.max_professor_numer if self.online else None,
+            symmetry_breaking=self.symmetry_breaking
+        )
 
-        return base_path, dat_file
+    def solution_hash(self, problem: ProblemData) -> str:
+        """
+        Identifies the solutions of the configuration on the data of the problem: the runs with the same hash solve the
+        same model with the same solver and options, so the solution of one of them can be reused for the others.
+        """
+        return Hashable.hash_data(f"{problem.hash()}{self.problem_limits()!r}{self.online=}{self.solver=}"
+                                  f"{self.optimization_time_limit=}{self.optimization_gap=}")
 
     def __repr__(self):
         return f"OptimizationConfiguration({self.id=}, {self.commission_id=}, {self.max_duration=}, " \
                f"{self.max_commissions_morning=}, {self.max_commissions_afternoon=}, {self.online=}, " \
                f"{self.min_professor_number=}, {self.min_professor_number_masters=}, {self.max_professor_numer=}, " \
-               f"{self.solver=}, {self.optimization_time_limit=}, {self.optimization_gap=})"
+               f"{self.solver=}, {self.optimization_time_limit=}, {self.optimization_gap=}, " \
+               f"{self.symmetry_breaking=})"
 
-    def serialize(self):
+    def serialize(self, include_solutions: bool = True, include_executions: bool = True, include_logs: bool = True,
+                  normalized: bool = False):
         return {
             'id': self.id,
             'title': self.title,
@@ -389,62 +448,162 @@ class OptimizationConfiguration(Base, Hashable):
             'solver': self.solver.value,
             'optimization_time_limit': self.optimization_time_limit,
             'optimization_gap': self.optimization_gap,
+            'symmetry_breaking': self.symmetry_breaking.value,
             'run_lock': self.run_lock,
-            'solution_commissions': [sol.serialize() for sol in self.solution_commissions],
-            'execution_details': [ed.serialize() for ed in self.execution_details]
+            **({
+                'solution_commissions': [sol.serialize(normalized) for sol in self.solution_commissions]
+            } if include_solutions else {}),
+            **({
+                'execution_details': [ed.serialize(include_log=include_logs) for ed in self.execution_details]
+            } if include_executions else {})
         }
 
-    def solver_wrapper(self, cc_path: Path, version_hash: str, logger: logging.Logger):
+    @staticmethod
+    def load_options(include_solutions: bool = True, include_executions: bool = True, include_logs: bool = True):
+        """
+        Loader options that fetch the collections needed by serialize() with one IN query each.
+        """
+        options = []
+        if include_solutions:
+            options.append(selectinload(OptimizationConfiguration.solution_commissions).options(
+                selectinload(SolutionCommission.professors),
+                selectinload(SolutionCommission.students)
+            ))
+        if include_executions:
+            executions = selectinload(OptimizationConfiguration.execution_details)
+            # The solver logs are the largest column of the database, we don't read them if they aren't sent.
+            options.append(executions if include_logs else executions.options(defer(ExecutionDetails.optimizer_log)))
+        return tuple(options)
+
+    def solver_wrapper(self, problem: ProblemData, cc_path: Path, version_hash: str, logger: logging.Logger,
+                       dump_format: str | None = None, dump_symbolic_labels: bool = False):
         logger.setLevel(logging.INFO)
 
         logger.info(f"Starting optimization for commission with ID ${self.commission_id},"
                     f" version hash ${version_hash}.")
 
         try:
-            self._solve(cc_path, logger, version_hash)
+            self._solve(problem, cc_path, logger, version_hash, dump_format, dump_symbolic_labels)
         except Exception as e:
             logger.error(f"An error occurred while solving the optimization problem: {e}")
             return None
         else:
             logger.info("Optimization completed and correctly saved to database.")
 
-    def _solve(self, cc_path: Path, logger: logging.Logger, version_hash: str):
-        dat_path = cc_path / "temp.dat"
+    def _solve(self, problem: ProblemData, cc_path: Path, logger: logging.Logger, version_hash: str,
+               dump_format: str | None, dump_symbolic_labels: bool):
+        """
+        :param dump_format: The format of the copy of the model written for debugging, if any. The solvers that read
+        the model from a file also keep their files only when it is set.
+        """
+        limits = self.problem_limits()
 
-        model: AbstractModel
+        model: ConcreteModel
         if self.online:
             # mindurata
-            model = optimization.models.create_min_durata_model(dat_path)
+            model = optimization.models.create_min_durata_model(problem, limits)
         else:
             # maxdurata
-            model = optimization.models.create_max_durata_model(dat_path)
+            model = optimization.models.create_max_durata_model(problem, limits)
         logger.debug("Optimization model created")
 
-        model_filename = cc_path / "model.lp"
-        # Actually create the model that will be solved
-        model.write(str(model_filename), io_options={'symbolic_solver_labels': True})
-        logger.debug(f"Model written to file ${model_filename}")
+        heuristic_solution = optimization.heuristic.greedy_solution(model, limits)
+        if heuristic_solution is not None:
+            optimization.heuristic.warm_start(model, heuristic_solution)
+            logger.info(f"The heuristic found a solution with {len(heuristic_solution.used_commissions)} commissions")
+        else:
+            logger.info("The heuristic couldn't find a solution")
+
+        if dump_format is not None:
+            model_filename = optimization.models.dump_model(model, cc_path, dump_format, dump_symbolic_labels)
+            logger.debug(f"Model written to file ${model_filename}")
+        keep_files = dump_format is not None
+
+        ed = ExecutionDetails(self.commission_id, self.id)
+        if self.solver == SolverEnum.PORTFOLIO:
+            solver, run = self._race_solvers(model, limits, heuristic_solution is not None, cc_path, keep_files,
+                                             logger)
+        elif self.solver == SolverEnum.HEURISTIC:
+            solver = self.solver
+            run = self._run_annealing(model, limits, logger)
+        else:
+            solver = self.solver
+            run = self._run_solver(self.solver, model, heuristic_solution is not None, cc_path / "solver.log",
+                                   keep_files, logger)
+
+        ed.finished(run.ok, run.optimal, run.time_limit_reached)
+        ed.solver = solver
+        ed.optimizer_log = run.log
+
+        self._save_execution_details(ed)
 
+        if run.ok:
+            # The heuristic can't prove that its solution is optimal
+            if run.has_solution and (run.optimal or run.time_limit_reached or solver == SolverEnum.HEURISTIC):
+                # todo return also the reason why the solver stopped
+                return SolutionCommission.generate_from_model(self, model, version_hash)
+            else:
+                # todo decide what to do in case of failure
+                logger.error(f"Solver failed to reach optimality. {run.message}")
+                return None
+        else:
+            # todo decide what to do in case of failure
+            logger.error(f"Solver encountered an error. {run.message}")
+            return None
+
+    def _create_solver(self, solver_type: SolverEnum, solver_log_path: Path, keep_files: bool = False):
+        """
+        :param keep_files: Whether the solvers that read the model from a file keep it, with their other files.
+        :return: The solver, with the time limit and the gap of the configuration, and the arguments to pass to its
+        solve() method.
+        """
         solver_arguments = dict()
         solver_arguments['options'] = dict()
 
-        if self.solver == SolverEnum.CPLEX:
+        if solver_type == SolverEnum.CPLEX:
             solver_arguments['options']['timelimit'] = self.optimization_time_limit
             solver_arguments['options']['mip_tolerances_mipgap'] = self.optimization_gap
-            solver_arguments['executable'] = "/opt/ibm/ILOG/CPLEX_Studio128/cplex/bin/x86-64_linux/cplex"
-        elif self.solver == SolverEnum.GLPK:
+            solver_arguments['executable'] = CPLEX_EXECUTABLE
+        elif solver_type == SolverEnum.GLPK:
             solver_arguments['options']['tmlim'] = self.optimization_time_limit
             solver_arguments['options']['mipgap'] = self.optimization_gap
-        elif self.solver == SolverEnum.GUROBI:
+        elif solver_type == SolverEnum.GUROBI:
             solver_arguments['options']['TimeLimit'] = self.optimization_time_limit
             solver_arguments['options']['MIPGap'] = self.optimization_gap
+        elif solver_type == SolverEnum.HIGHS:
+            solver_arguments['options']['time_limit'] = self.optimization_time_limit
+            solver_arguments['options']['mip_rel_gap'] = self.optimization_gap
+        elif solver_type == SolverEnum.CBC:
+            solver_arguments['options']['sec'] = self.optimization_time_limit
+            solver_arguments['options']['ratio'] = self.optimization_gap
         else:
             raise ValueError("Unknown solver")
 
+        solve_arguments = dict()
+        if solver_type.in_memory:
+            # The APPSI interfaces take the options and the log file in a different way than the executables, and
+            # they don't write any file
+            solver = SolverFactory(solver_type.factory_name)
+            solver.config.logfile = str(solver_log_path.absolute())
+            solve_arguments['options'] = solver_arguments['options']
+        else:
+            solver = SolverFactory(solver_type.factory_name, **solver_arguments)
+            solve_arguments['keepfiles'] = keep_files
+            solve_arguments['logfile'] = str(solver_log_path.absolute())
+
+        return solver, solve_arguments
+
+    def _run_solver(self, solver_type: SolverEnum, model: ConcreteModel, has_heuristic_solution: bool,
+                    solver_log_path: Path, keep_files: bool, logger: logging.Logger) -> SolverRun:
+        """
+        Solves the model with a MIP solver, starting from the heuristic solution if there is one and the solver accepts
+        it. Without a solution from the solver, the model keeps the values of the heuristic solution.
+        """
+        solver, solve_arguments = self._create_solver(solver_type, solver_log_path, keep_files)
         logger.debug("Options for selected solver set")
 
-        solver = SolverFactory(self.solver.value, **solver_arguments)
-        solver_log_path = cc_path / "solver.log"
+        # The solvers that can't be warm started still get the heuristic solution as a fallback, see below
+        warm_start = has_heuristic_solution and solver.warm_start_capable()
 
         # Wipe the file clean if it already exists, otherwise the existing content will mess with the watchdog logger.
         solver_log_path.open("w").close()
@@ -461,12 +620,13 @@ class OptimizationConfiguration(Base, Hashable):
         observer.schedule(solver_log_handler, str(solver_log_path.parent), recursive=False)
         observer.start()
         logger.info("Running solver...")
-        ed = ExecutionDetails(self.commission_id, self.id)
         results: SolverResults = solver.solve(
             model,
             tee=True,
-            keepfiles=True,
-            logfile=str(solver_log_path.absolute())
+            warmstart=warm_start,
+            # The solution is loaded below, only if the solver found one
+            load_solutions=False,
+            **solve_arguments
         )
         logger.info("The solver has exited.")
         logger.debug("Stopping observer...")
@@ -475,33 +635,105 @@ class OptimizationConfiguration(Base, Hashable):
         observer.join()
         logger.debug("Observer thread joined.")
 
-        is_solver_ok = results.solver.status == SolverStatus.ok
         solver_reached_optimality = results.solver.termination_condition == TerminationCondition.optimal
         solver_reached_time_limit = results.solver.termination_condition == TerminationCondition.maxTimeLimit
+        # The APPSI interfaces report the time limit as an aborted run
+        is_solver_ok = results.solver.status == SolverStatus.ok or (solver_type.in_memory and solver_reached_time_limit)
 
         logger.debug(f"Solver status: {results.solver.status}")
 
-        ed.finished(is_solver_ok, solver_reached_optimality, solver_reached_time_limit)
-        ed.optimizer_log = solver_log_handler.read_file()
+        from_solver = len(results.solution) > 0
+        has_solution = from_solver
+        if has_solution:
+            model.solutions.load_from(results)
+        elif has_heuristic_solution:
+            # The variables still hold the values set by the warm start
+            logger.warning("The solver didn't find a solution, the one of the heuristic will be used instead")
+            has_solution = True
+
+        return SolverRun(
+            ok=is_solver_ok,
+            optimal=solver_reached_optimality,
+            time_limit_reached=solver_reached_time_limit,
+            has_solution=has_solution,
+            log=solver_log_handler.read_file(),
+            message=f"Solver status: {results.solver.status}",
+            from_solver=from_solver
+        )
+
+    def _race_solvers(self, model: ConcreteModel, limits: ProblemLimits, has_heuristic_solution: bool, cc_path: Path,
+                      keep_files: bool, logger: logging.Logger) -> tuple[SolverEnum | None, SolverRun]:
+        """
+        Races all the solvers available on the machine, and the simulated annealing, on the model.
+        :return: The solver whose solution has been loaded into the model, and its run.
+        """
+        def mip_run(solver_type: SolverEnum):
+            return lambda m: self._run_solver(solver_type, m, has_heuristic_solution,
+                                              cc_path / f"solver_{solver_type.value}.log", keep_files, logger)
+
+        runs = {SolverEnum.HEURISTIC: lambda m: self._run_annealing(m, limits, logger)}
+        for solver_type in SolverEnum.mip_solvers():
+            if solver_type == SolverEnum.CPLEX and not Path(CPLEX_EXECUTABLE).is_file():
+                # Pyomo complains loudly about a missing executable
+                continue
+            solver, _ = self._create_solver(solver_type, cc_path / f"solver_{solver_type.value}.log")
+            if solver.available(exception_flag=False):
+                runs[solver_type] = mip_run(solver_type)
+
+        time_limit = self.optimization_time_limit + optimization.portfolio.GRACE_TIME
+        winner, outcomes = optimization.portfolio.race(model, runs, time_limit, logger)
+
+        summary = []
+        for solver in runs:
+            if solver not in outcomes:
+                summary.append(f"{solver.value}: stopped at the time limit of the portfolio")
+            else:
+                outcome = outcomes[solver]
+                summary.append(f"{solver.value}: optimal {outcome.optimal}, time limit reached "
+                               f"{outcome.time_limit_reached}, solution found {outcome.has_solution}"
+                               + (f" ({outcome.message})" if outcome.message is not None else ""))
+        if winner is None:
+            return None, SolverRun(False, False, len(outcomes) < len(runs), False, "\n".join(summary),
+                                   message="No solver found a solution")
+
+        logger.info(f"The solution of {winner.value} has been chosen")
+        run = outcomes[winner]
+        return winner, replace(run, log="\n".join([*summary, "", f"Log of {winner.value}:", run.log]))
+
+    def _run_annealing(self, model: ConcreteModel, limits: ProblemLimits, logger: logging.Logger) -> SolverRun:
+        """
+        Solves the problem with simulated annealing instead of a MIP solver, so the optimization gap is not used.
+        """
+        log_lines = []
+
+        def log(line: str):
+            logger.debug(line)
+            log_lines.append(line)
+
+        logger.info("Running simulated annealing...")
+        result = optimization.heuristic.simulated_annealing(model, limits, self.optimization_time_limit, log=log)
+        logger.info(f"Simulated annealing has stopped after {result.iterations} iterations.")
+
+        if result.solution is not None:
+            optimization.heuristic.warm_start(model, result.solution)
+
+        # It can't prove that a solution is optimal
+        return SolverRun(
+            ok=result.solution is not None,
+            optimal=False,
+            time_limit_reached=result.time_limit_reached,
+            has_solution=result.solution is not None,
+            log="\n".join(log_lines),
+            message=None if result.solution is not None else "No solution satisfies all the constraints"
+        )
 
+    def _save_execution_details(self, ed: 'ExecutionDetails'):
         session: sa.orm.Session
         with SessionMakerSingleton.get_session_maker().begin() as session:
             session.add(ed)
+            Commission.bump_versions(session, [self.commission_id])
             session.commit()
 
-        if is_solver_ok:
-            if solver_reached_optimality or solver_reached_time_limit:
-                # todo return also the reason why the solver stopped
-                return SolutionCommission.generate_from_model(self, model, version_hash)
-            else:
-                # todo decide what to do in case of failure
-                logger.error(f"Solver failed to reach optimality. Solver status: {results.solver.status}")
-                return None
-        else:
-            # todo decide what to do in case of failure
-            logger.error(f"Solver encountered an error. Solver status: {results.solver.status}")
-            return None
-
     def hash(self):
         return Hashable.hash_data(repr(self))
 
@@ -529,7 +761,7 @@ class SolutionCommission(Base):
 
     duration = mapped_column(sa.Integer, nullable=False)
 
-    version_hash = mapped_column(sa.String(64), nullable=False)
+    version_hash = mapped_column(sa.String(64), nullable=False, index=True)
 
     # _solution_commission_professors = sa.Table(
     #     'solution_commission_professors', metadata,
@@ -555,17 +787,22 @@ class SolutionCommission(Base):
         self.duration = 0
         self.professors = []
         self.students = []
-        # The version hash is used to identify the version of the model that generated this solution
-        # It is used to avoid having to recompute the solution if the model hasn't changed.
-        # It should be treated as the root of a variation of a merkle tree.
+        # The version hash is used to identify the version of the model that generated this solution, see
+        # OptimizationConfiguration.solution_hash().
+        # It is used to avoid having to recompute the solution if the model hasn't changed, see reuse_solution().
         self.version_hash = version_hash
 
     @staticmethod
-    def generate_from_model(conf: OptimizationConfiguration, model: AbstractModel, version_hash: str) \
+    def generate_from_model(conf: OptimizationConfiguration, model: ConcreteModel, version_hash: str) \
             -> tuple[List['SolutionCommission'], List['SolutionCommission']]:
         from session_maker import SessionMakerSingleton
         session: sa.orm.Session
         with SessionMakerSingleton.get_session_maker().begin() as session:
+            # The model refers to the professors and to the candidates by position, id_docente and id_candidato map
+            # them back to the database.
+            professors = {p.id: p for p in session.query(Professor).filter(Professor.id.in_(model.id_docente))}
+            students = {s.id: s for s in session.query(Student).filter(Student.id.in_(model.id_candidato))}
+
             # noinspection PyShadowingNames
             def extract_commissions(model_commissions, offset=0, morning=True):
                 from pyomo.environ import value
@@ -575,17 +812,14 @@ class SolutionCommission(Base):
                     new_commission = SolutionCommission(version_hash)
                     new_commission.morning = morning
 
-                    for index, professor in model.docenti.iterrows():
-                        if value(model.z[professor['Relatore'], commission]) > 0.8:
-                            session_professor = session.query(Professor).filter_by(id=int(professor['ID'])).first()
-                            new_commission.professors.append(session_professor)
+                    for professor in model.docenti:
+                        if value(model.z[professor, commission]) > 0.8:
+                            new_commission.professors.append(professors[model.id_docente[professor]])
 
-                    for candidate in model.candidati:
+                    for candidate in model.candidati_commissione[commission]:
                         if value(model.x[candidate, commission]) > 0.8:
-                            session_candidate = session.query(Student).filter_by(id=int(candidate)).first()
-
-                            new_commission.students.append(session_candidate)
-                            new_commission.duration += int(model.tesisti['Durata'][candidate])
+                            new_commission.students.append(students[model.id_candidato[candidate]])
+                            new_commission.duration += model.durata[candidate]
 
                     commissions.append(new_commission)
 
@@ -611,23 +845,84 @@ class SolutionCommission(Base):
 
             session.add_all(morning_commissions)
             session.add_all(afternoon_commissions)
+            Commission.bump_versions(session, [conf.commission_id])
 
             session.commit()
 
             return morning_commissions, afternoon_commissions
 
-    def serialize(self):
-        return {
+    @staticmethod
+    def reuse_solution(session: sa.orm.Session, conf: OptimizationConfiguration, version_hash: str) -> int | None:
+        """
+        Copies to the configuration the solution of an earlier run of the same commission with the same version hash,
+        see OptimizationConfiguration.solution_hash(), together with its execution details. The students are created
+        per commission, so the solutions of other commissions are never considered.
+        :return: The ID of the configuration whose solution has been copied, None if there's no such solution.
+        """
+        source_id = session.scalar(
+            sa.select(SolutionCommission.opt_config_id)
+            .filter_by(commission_id=conf.commission_id, version_hash=version_hash)
+            .limit(1)
+        )
+        if source_id is None:
+            return None
+
+        sources = (
+            session.query(SolutionCommission)
+            .options(selectinload(SolutionCommission.professors), selectinload(SolutionCommission.students))
+            .filter_by(opt_config_id=source_id)
+            .order_by(SolutionCommission.order)
+        )
+        for source in sources:
+            copy = SolutionCommission(version_hash)
+            copy.order = source.order
+            copy.morning = source.morning
+            copy.duration = source.duration
+            copy.professors = list(source.professors)
+            copy.students = list(source.students)
+            copy.commission_id = conf.commission_id
+            copy.opt_config_id = conf.id
+            session.add(copy)
+
+        source_ed = (
+            session.query(ExecutionDetails)
+            .options(defer(ExecutionDetails.optimizer_log))
+            .filter_by(opt_config_id=source_id, success=True)
+            .order_by(ExecutionDetails.id.desc())
+            .first()
+        )
+        ed = ExecutionDetails(conf.commission_id, conf.id, datetime.now())
+        if source_ed is not None:
+            ed.finished(True, source_ed.solver_reached_optimality, source_ed.solver_time_limit_reached)
+            ed.solver = source_ed.solver
+        else:
+            ed.finished(True, False, False)
+        ed.optimizer_log = f"The solver hasn't been run: the solution of the configuration {source_id}, " \
+                           f"computed on the same data and with the same options, has been reused."
+        session.add(ed)
+
+        return source_id
+
+    def serialize(self, normalized: bool = False):
+        """
+        :param normalized: If set, the professors and the students are referenced by ID instead of being embedded.
+        """
+        serialized = {
             'id': self.id,
             'order': self.order,
             'morning': self.morning,
             'commission_id': self.commission_id,
             'opt_config_id': self.opt_config_id,
             'duration': self.duration,
-            'version_hash': self.version_hash,
-            'professors': [prof.serialize() for prof in self.professors],
-            'students': [stud.serialize() for stud in self.students]
+            'version_hash': self.version_hash
         }
+        if normalized:
+            serialized['professor_ids'] = [prof.id for prof in self.professors]
+            serialized['student_ids'] = [stud.id for stud in self.students]
+        else:
+            serialized['professors'] = [prof.serialize() for prof in self.professors]
+            serialized['students'] = [stud.serialize() for stud in self.students]
+        return serialized
 
 
 class SolutionCommissionProfessor(Base):
@@ -665,6 +960,8 @@ class ExecutionDetails(Base, Hashable):
     solver_time_limit_reached = mapped_column(sa.Boolean, nullable=False, server_default='False', default=False)
     error_message = mapped_column(sa.String(256), nullable=True)
     optimizer_log = mapped_column(sa.Text, nullable=True)
+    # The solver that produced the solution, which is the winner of the race for a portfolio
+    solver: Mapped[SolverEnum | None] = mapped_column(StringEnum(SolverEnum), nullable=True)
 
     def __init__(self, commission_id: int, opt_config_id: int, start_time: datetime = datetime.now()):
         super().__init__()
@@ -672,7 +969,7 @@ class ExecutionDetails(Base, Hashable):
         self.opt_config_id = opt_config_id
         self.start_time = start_time
 
-    def serialize(self):
+    def serialize(self, include_log: bool = True):
         return {
             'id': self.id,
             'commission_id': self.commission_id,
@@ -683,12 +980,13 @@ class ExecutionDetails(Base, Hashable):
             'solver_reached_optimality': self.solver_reached_optimality,
             'solver_time_limit_reached': self.solver_time_limit_reached,
             'error_message': self.error_message,
-            'optimizer_log': self.optimizer_log
+            'solver': self.solver.value if self.solver is not None else None,
+            **({'optimizer_log': self.optimizer_log} if include_log else {})
         }
 
     def __repr__(self):
         return f"ExecutionDetails({self.id=}, {self.commission_id=}, {self.opt_config_id=}, {self.start_time=}, " \
-               f"{self.end_time=}, {self.success=}, {self.error_message=})"
+               f"{self.end_time=}, {self.success=}, {self.error_message=}, {self.solver=})"
 
     def hash(self):
         return Hashable.hash_data(repr(self))
@@ -0,0 +1,400 @@
+import math
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pyomo.environ as pyo
+
+from model import SymmetryBreaking
+from optimization.models import professor_ranking
+from optimization.problem import ProblemLimits
+
+
+@dataclass(frozen=True, slots=True)
+class HeuristicSolution:
+    """
+    An assignment of the candidates and of the professors to the commissions. Candidates and professors are identified
+    by their position in the model.
+    """
+    # The commission of each candidate
+    commissions: tuple[int, ...]
+    # The professors of each commission
+    professors: tuple[frozenset[int], ...]
+    # The duration of each commission
+    durations: tuple[int, ...]
+
+    @property
+    def used_commissions(self) -> list[int]:
+        return [k for k, duration in enumerate(self.durations) if duration > 0]
+
+
+def _candidate_groups(model: pyo.ConcreteModel) -> list[list[int]]:
+    """
+    A professor can only sit in one commission, so all the candidates that share a supervisor or a counter-supervisor,
+    even indirectly, have to be discussed in the same commission.
+    """
+    parent = list(range(len(model.candidati)))
+
+    def find(t: int) -> int:
+        while parent[t] != t:
+            parent[t] = parent[parent[t]]
+            t = parent[t]
+        return t
+
+    first_candidate = {}
+    for t in model.candidati:
+        for p in (model.relatore[t], model.controrelatore[t]):
+            if p is not None:
+                parent[find(t)] = find(first_candidate.setdefault(p, t))
+
+    groups = {}
+    for t in model.candidati:
+        groups.setdefault(find(t), []).append(t)
+    return list(groups.values())
+
+
+def _group_commissions(model: pyo.ConcreteModel, groups: list[list[int]]) -> list[list[int]]:
+    """
+    :return: The commissions where all the professors of each group are available.
+    """
+    allowed = []
+    for members in groups:
+        commissions = set(model.commissioni_candidato[members[0]])
+        for t in members[1:]:
+            commissions.intersection_update(model.commissioni_candidato[t])
+        allowed.append(sorted(commissions))
+    return allowed
+
+
+def _pack(model: pyo.ConcreteModel, limits: ProblemLimits, groups: list[list[int]]) -> tuple[list[int], bool]:
+    """
+    Packs the groups of candidates into the commissions, from the longest group, while respecting the availability of
+    the professors. Each group goes to the shortest commission already in use where it fits, so that their durations
+    stay balanced; a new commission is only opened when there's none, the morning ones first because the afternoon
+    ones are penalized. A group that doesn't fit anywhere goes to the shortest commission it can be discussed in.
+    :return: The commission of each group, and whether all the commissions respect the maximum duration.
+    """
+    durations = [0] * len(model.commissioni)
+    group_commissions = [0] * len(groups)
+    fits = True
+
+    allowed = _group_commissions(model, groups)
+    group_durations = [sum(model.durata[t] for t in members) for members in groups]
+    for g in sorted(range(len(groups)), key=lambda i: group_durations[i], reverse=True):
+        if len(allowed[g]) == 0:
+            # The supervisors of the group are never available at the same time
+            return group_commissions, False
+
+        fitting = [k for k in allowed[g] if durations[k] + group_durations[g] <= limits.max_duration]
+        if len(fitting) == 0:
+            fits = False
+            k = min(allowed[g], key=lambda c: durations[c])
+        else:
+            in_use = [k for k in fitting if durations[k] > 0]
+            k = min(in_use, key=lambda c: durations[c]) if len(in_use) > 0 else fitting[0]
+
+        durations[k] += group_durations[g]
+        group_commissions[g] = k
+
+    return group_commissions, fits
+
+
+def _build_solution(model: pyo.ConcreteModel, limits: ProblemLimits, groups: list[list[int]],
+                    group_commissions: list[int]) -> HeuristicSolution:
+    commission_count = len(model.commissioni)
+    durations = [0] * commission_count
+    commissions = [0] * len(model.candidati)
+    professors = [set() for _ in range(commission_count)]
+
+    for members, k in zip(groups, group_commissions):
+        for t in members:
+            commissions[t] = k
+            durations[k] += model.durata[t]
+            professors[k].add(model.relatore[t])
+            if model.controrelatore[t] is not None:
+                professors[k].add(model.controrelatore[t])
+
+    return _relabel(model, limits.symmetry_breaking, commissions, professors, durations)
+
+
+def _meets_professor_limits(model: pyo.ConcreteModel, limits: ProblemLimits, solution: HeuristicSolution) -> bool:
+    """
+    Checks the limits on the number of professors of the online model, if they are set.
+    """
+    if limits.min_professors is None:
+        return True
+
+    masters = [False] * len(solution.durations)
+    for t, k in enumerate(solution.commissions):
+        masters[k] |= model.durata[t] > 15
+
+    for k in solution.used_commissions:
+        required = max(limits.min_professors, limits.min_professors_masters) if masters[k] else limits.min_professors
+        if not required <= len(solution.professors[k]) <= limits.max_professors:
+            return False
+
+    return True
+
+
+def greedy_solution(model: pyo.ConcreteModel, limits: ProblemLimits) -> HeuristicSolution | None:
+    """
+    Builds a solution by packing the groups of candidates that share a professor into the commissions, see _pack().
+    Every professor of the problem attends some candidates, so the professors of each commission are fixed by its
+    candidates: the heuristic gives up if they don't satisfy the limits of the online model.
+    :return: The solution, or None if the heuristic couldn't find one.
+    """
+    if len(model.candidati) == 0:
+        return None
+
+    groups = _candidate_groups(model)
+    group_commissions, fits = _pack(model, limits, groups)
+    if not fits:
+        return None
+
+    solution = _build_solution(model, limits, groups, group_commissions)
+    return solution if _meets_professor_limits(model, limits, solution) else None
+
+
+def _relabel(model: pyo.ConcreteModel, symmetry_breaking: SymmetryBreaking, commissions: list[int],
+             professors: list[set[int]], durations: list[int]) -> HeuristicSolution:
+    """
+    Renumbers the commissions of each part of the day, so that the solution satisfies the symmetry breaking
+    constraints of the model.
+    """
+    if symmetry_breaking == SymmetryBreaking.ANCHOR:
+        rank = {p: i for i, p in enumerate(professor_ranking(model))}
+
+        def order(k):
+            return min((rank[p] for p in professors[k]), default=len(rank))
+    else:
+        # Decreasing duration also puts the commissions in use first
+        def order(k):
+            return -durations[k]
+
+    label = {}
+    for shift in (list(model.commissioni_mattina), list(model.commissioni_pomeriggio)):
+        for new, old in zip(shift, sorted(shift, key=order)):
+            label[old] = new
+
+    new_professors = [frozenset()] * len(durations)
+    new_durations = [0] * len(durations)
+    for old, new in label.items():
+        new_professors[new] = frozenset(professors[old])
+        new_durations[new] = durations[old]
+
+    return HeuristicSolution(
+        commissions=tuple(label[k] for k in commissions),
+        professors=tuple(new_professors),
+        durations=tuple(new_durations)
+    )
+
+
+def warm_start(model: pyo.ConcreteModel, solution: HeuristicSolution):
+    """
+    Sets the values of the variables of the model to the solution, so that the solvers accepting a warm start can use
+    it as their first incumbent.
+    """
+    for t, k in model.assegnamenti:
+        model.x[t, k].set_value(int(solution.commissions[t] == k))
+
+    for k in model.commissioni:
+        model.y[k].set_value(int(solution.durations[k] > 0))
+        for p in model.docenti:
+            if not model.z[p, k].fixed:
+                model.z[p, k].set_value(int(p in solution.professors[k]))
+
+    used = solution.used_commissions
+    ordinary = [sum(1 for p in professors if model.is_ordinario[p]) for professors in solution.professors]
+    model.w.set_value(min(solution.durations[k] for k in used))
+    model.min_ord.set_value(min(ordinary[k] for k in used))
+    model.max_ord.set_value(max(ordinary))
+
+    if hasattr(model, 'w2'):
+        # Online model
+        model.w2.set_value(max(solution.durations))
+        for k in model.commissioni:
+            model.y2[k].set_value(int(any(model.durata[t] > 15 for t in model.candidati_commissione[k]
+                                          if solution.commissions[t] == k)))
+    else:
+        model.min_doc.set_value(min(len(solution.professors[k]) for k in used))
+        model.max_doc.set_value(max(len(professors) for professors in solution.professors))
+
+
+@dataclass(frozen=True, slots=True)
+class AnnealingResult:
+    # The best solution found, None if every solution visited broke some constraint
+    solution: HeuristicSolution | None
+    iterations: int
+    time_limit_reached: bool
+
+
+def simulated_annealing(model: pyo.ConcreteModel, limits: ProblemLimits, time_limit: float,
+                        iterations: int | None = None, seed: int = 0,
+                        log: Callable[[str], None] | None = None) -> AnnealingResult:
+    """
+    Searches the assignments of the groups of candidates to the commissions with simulated annealing, starting from the
+    packing of the greedy heuristic. The moves either relocate a group or swap two groups of different commissions.
+    The groups don't share any professor, so the duration and the number of professors, of ordinary professors and of
+    masters candidates of each commission are sums over its groups: they are updated in constant time by each move, and
+    the objective of the model is computed from them. The constraints on the maximum duration and on the number of
+    professors are penalized, so the search can go through the solutions that break them.
+    :param time_limit: The maximum running time, in seconds.
+    :param iterations: The number of moves tried, by default proportional to the size of the problem.
+    :param log: Called with a line of progress from time to time.
+    """
+    start_time = time.monotonic()
+    rng = random.Random(seed)
+
+    if len(model.candidati) == 0:
+        return AnnealingResult(None, 0, False)
+
+    groups = _candidate_groups(model)
+    group_commissions, _ = _pack(model, limits, groups)
+
+    group_count = len(groups)
+    commission_count = len(model.commissioni)
+    if iterations is None:
+        iterations = 100 * group_count * commission_count
+
+    allowed = _group_commissions(model, groups)
+    group_durations = np.zeros(group_count, dtype=np.int64)
+    group_professors = np.zeros(group_count, dtype=np.int64)
+    group_ordinaries = np.zeros(group_count, dtype=np.int64)
+    group_masters = np.zeros(group_count, dtype=np.int64)
+    for g, members in enumerate(groups):
+        if len(allowed[g]) == 0:
+            if log is not None:
+                log(f"The professors of the candidates {members} must sit in the same commission, but they are never "
+                    f"available at the same time")
+            return AnnealingResult(None, 0, False)
+
+        professors = set()
+        for t in members:
+            professors.add(model.relatore[t])
+            if model.controrelatore[t] is not None:
+                professors.add(model.controrelatore[t])
+            group_durations[g] += model.durata[t]
+            group_masters[g] += model.durata[t] > 15
+        group_professors[g] = len(professors)
+        group_ordinaries[g] = sum(int(model.is_ordinario[p]) for p in professors)
+
+    assignment = np.array(group_commissions, dtype=np.int64)
+    durations = np.bincount(assignment, weights=group_durations, minlength=commission_count).astype(np.int64)
+    professor_counts = np.bincount(assignment, weights=group_professors, minlength=commission_count).astype(np.int64)
+    ordinary_counts = np.bincount(assignment, weights=group_ordinaries, minlength=commission_count).astype(np.int64)
+    masters_counts = np.bincount(assignment, weights=group_masters, minlength=commission_count).astype(np.int64)
+
+    afternoon = np.zeros(commission_count, dtype=bool)
+    afternoon[list(model.commissioni_pomeriggio)] = True
+
+    online = hasattr(model, 'w2')
+    # A unit of violation costs more than any change of the objective
+    penalty = model.alpha * limits.max_duration
+
+    def evaluate() -> tuple[float, int]:
+        """
+        :return: The objective of the model, to be minimized, and the total violation of the constraints.
+        """
+        used = durations > 0
+        violation = int(np.maximum(durations - limits.max_duration, 0).sum())
+        ordinary_spread = ordinary_counts.max() - ordinary_counts[used].min()
+        afternoon_used = int(np.count_nonzero(used & afternoon))
+
+        if online:
+            required = np.where(masters_counts > 0, max(limits.min_professors, limits.min_professors_masters),
+                                limits.min_professors)
+            violation += int(np.maximum(required - professor_counts, 0)[used].sum())
+            violation += int(np.maximum(professor_counts - limits.max_professors, 0).sum())
+            cost = model.alpha * durations.max() - model.beta * durations[used].min() \
+                + model.gamma * ordinary_spread + afternoon_used
+        else:
+            professor_spread = professor_counts.max() - professor_counts[used].min()
+            cost = -(model.alpha * durations[used].min() - model.beta * ordinary_spread
+                     - model.gamma * professor_spread - afternoon_used)
+
+        return float(cost), violation
+
+    def move(g: int, k: int):
+        old = assignment[g]
+        assignment[g] = k
+        durations[old] -= group_durations[g]
+        durations[k] += group_durations[g]
+        professor_counts[old] -= group_professors[g]
+        professor_counts[k] += group_professors[g]
+        ordinary_counts[old] -= group_ordinaries[g]
+        ordinary_counts[k] += group_ordinaries[g]
+        masters_counts[old] -= group_masters[g]
+        masters_counts[k] += group_masters[g]
+
+    def describe(objective: float | None) -> str:
+        # The objective of the offline model is maximized
+        return '-' if objective is None else f"{objective if online else -objective:.0f}"
+
+    objective, violation = evaluate()
+    current = objective + penalty * violation
+    best_objective = objective if violation == 0 else None
+    best_assignment = assignment.copy() if violation == 0 else None
+
+    # The temperature falls geometrically, from the cost of a minute of difference between the commissions to the
+    # smallest difference of the objective
+    initial_temperature = float(model.alpha)
+    final_temperature = 0.5
+
+    progress = 0.0
+    iteration = 0
+    time_limit_reached = False
+    while iteration < iterations:
+        if iteration % 256 == 0:
+            elapsed = time.monotonic() - start_time
+            if elapsed >= time_limit:
+                time_limit_reached = True
+                break
+            progress = max(iteration / iterations, elapsed / time_limit)
+            temperature = initial_temperature * (final_temperature / initial_temperature) ** progress
+
+            if log is not None and iteration % (256 * 64) == 0:
+                log(f"Iteration {iteration}, {elapsed:.1f} s: temperature {temperature:.1f}, "
+                    f"current cost {current:.0f}, best objective {describe(best_objective)}")
+        iteration += 1
+
+        g = rng.randrange(group_count)
+        old = int(assignment[g])
+        if rng.random() < 0.5:
+            # Relocate
+            k = rng.choice(allowed[g])
+            if k == old:
+                continue
+            moves = [(g, k)]
+        else:
+            # Swap
+            h = rng.randrange(group_count)
+            k = int(assignment[h])
+            if k == old or k not in allowed[g] or old not in allowed[h]:
+                continue
+            moves = [(g, k), (h, old)]
+
+        for group, commission in moves:
+            move(group, commission)
+
+        objective, violation = evaluate()
+        candidate = objective + penalty * violation
+        if candidate <= current or rng.random() < math.exp((current - candidate) / temperature):
+            current = candidate
+            if violation == 0 and (best_objective is None or objective < best_objective):
+                best_objective = objective
+                best_assignment = assignment.copy()
+        else:
+            for group, _ in reversed(moves):
+                move(group, old if group == g else k)
+
+    if log is not None:
+        log(f"Stopped after {iteration} iterations, {time.monotonic() - start_time:.1f} s: best objective "
+            f"{describe(best_objective)}")
+
+    if best_assignment is None:
+        return AnnealingResult(None, iteration, time_limit_reached)
+
+    solution = _build_solution(model, limits, groups, best_assignment.tolist())
+    return AnnealingResult(solution, iteration, time_limit_reached)
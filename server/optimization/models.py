@@ -1,134 +1,239 @@
-import pyomo.environ as pyo
-import pandas
+import functools
 from pathlib import Path
 
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.common.gc_manager import PauseGC
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+from model import SymmetryBreaking
+from optimization.problem import ProblemData, ProblemLimits
+
+
+def pause_gc(create_model):
+    """
+    Pauses the cyclic garbage collector while a model is built. Pyomo allocates lots of small objects, that would
+    trigger collections scanning the whole model built so far, making the build time grow faster than the model.
+    """
+
+    @functools.wraps(create_model)
+    def wrapper(*args, **kwargs):
+        with PauseGC():
+            return create_model(*args, **kwargs)
+
+    return wrapper
 
-# noinspection PyUnresolvedReferences
-def create_min_durata_model(dat_path: Path) -> pyo.AbstractModel:
-    model = pyo.AbstractModel()
+
+def linear_sum(variables: list, coefficients: list | None = None) -> LinearExpression:
+    """
+    Builds sum(coefficients[i] * variables[i]) directly as a linear expression, instead of going through the generic
+    expression system one term at a time like sum() does.
+    """
+    if coefficients is None:
+        coefficients = [1] * len(variables)
+    return LinearExpression(constant=0, linear_coefs=coefficients, linear_vars=variables)
+
+
+def create_base_model(problem: ProblemData, limits: ProblemLimits) -> pyo.ConcreteModel:
+    """
+    Creates a model instance holding the sets and the data of the problem, shared by all the optimization models.
+    Candidates and professors are identified by their position in problem.candidates and problem.professors:
+    model.id_candidato and model.id_docente map them back to their database IDs.
+    :raises ValueError: if a candidate can't be assigned to any commission.
+    """
+    model = pyo.ConcreteModel()
+    professors = list(problem.professors.values())
 
     # 1. Parameters
-    model.max_durata = pyo.Param()
-    model.min_docenti = pyo.Param()
-    model.min_docenti_magistrale = pyo.Param()
-    model.max_docenti = pyo.Param()
+    model.max_durata = pyo.Param(within=pyo.Integers, initialize=limits.max_duration)
 
     # 2. Sets
-    model.commissioni_mattina = pyo.Set()
-    model.commissioni_pomeriggio = pyo.Set()
-
-    model.commissioni = model.commissioni_mattina | model.commissioni_pomeriggio
-
-    # 3. Data
-    model.excel_path = pyo.Param(within=pyo.Any)
-
-    # 4. Create the model instance
-    model = model.create_instance(str(dat_path))
-
-    # 5. Read the data from the excel file
-    # todo move to a csv file
-    model.tesisti = pandas.read_excel(pyo.value(model.excel_path), index_col=0, dtype={'Matricola': str})
-    # We drop the rows where the column 'Relatore' is not defined
-    model.tesisti = model.tesisti.dropna(subset=['Relatore'])
-
-    # 6. Set the candidates
-    model.candidati = set(model.tesisti.index)
-    model.n_tesisti = len(model.tesisti)
-
-    # 7. Set the supervisors
-    # We first load the supervisors, and to avoid duplicates we drop them
-    model.relatori = model.tesisti.drop_duplicates(subset='Relatore')
-    # todo load also the database IDs corresponding to all the professors
-    # Then, we select the columns we are interested in
-    model.relatori = model.relatori[['Relatore', 'MATTINA', 'POMERIGGIO', 'Ruolo']]
-    # Finally, we rename the columns of the new dataframe
-    model.relatori.columns = ['Relatore', 'MATTINA', 'POMERIGGIO', 'tipo']
-
-    # 8. Set the counter-supervisors (the procedure is the same as for the supervisors)
-    model.controrelatori = model.tesisti.drop_duplicates(subset='Controrelatore').dropna(subset=['Controrelatore'])
-    model.controrelatori = model.controrelatori[['Controrelatore', 'MATTINA', 'POMERIGGIO', 'Ruolo.1']]
-    model.controrelatori.columns = ['Relatore', 'MATTINA', 'POMERIGGIO', 'tipo']
-
-    # 9. Set the assistant supervisors
-    # model.co_relatori = model.tesisti.drop_duplicates(subset='Co-Relatore').dropna(subset=['Co-Relatore'])
-    # model.co_relatori = model.assistanti[['Assistente', 'MATTINA', 'POMERIGGIO', 'Ruolo.2']]
-    # model.co_relatori.columns = ['Relatore', 'MATTINA', 'POMERIGGIO', 'tipo']
-
-    # 10. Concatenate the supervisors, counter-supervisors and assistant supervisors
-    model.docenti = (
-        pandas
-        # .concat([model.relatori, model.controrelatori, model.co_relatori], ignore_index=True)
-        .concat([model.relatori, model.controrelatori], ignore_index=True)
-        .drop_duplicates().reset_index(drop=True)
+    model.commissioni_mattina = pyo.Set(initialize=limits.morning_commissions, ordered=True)
+    model.commissioni_pomeriggio = pyo.Set(initialize=limits.afternoon_commissions, ordered=True)
+
+    # Not defined as the union of the two sets above, that would be computed again every time it is iterated
+    model.commissioni = pyo.Set(initialize=limits.commissions, ordered=True)
+
+    model.candidati = pyo.Set(initialize=range(len(problem.candidates)), ordered=True)
+    model.docenti = pyo.Set(initialize=range(len(professors)), ordered=True)
+
+    # Database IDs of the candidates and of the professors
+    model.id_candidato = [c.id for c in problem.candidates]
+    model.id_docente = [p.id for p in professors]
+
+    # 3. Data of the problem, indexed by the position of the candidates and of the professors
+    indice_docente = {p.id: i for i, p in enumerate(professors)}
+
+    model.n_tesisti = len(problem.candidates)
+    model.durata = [c.duration for c in problem.candidates]
+    model.relatore = [indice_docente[c.supervisor_id] for c in problem.candidates]
+    model.controrelatore = [indice_docente[c.counter_supervisor_id] if c.counter_supervisor_id is not None else None
+                            for c in problem.candidates]
+
+    model.is_ordinario = np.fromiter((p.is_ordinary for p in professors), dtype=np.int8, count=len(professors))
+
+    # Availability of each professor in each commission, as [professor, commission]
+    model.disponibilita = limits.shift_availability(
+        np.fromiter((p.available_morning for p in professors), dtype=bool, count=len(professors)),
+        np.fromiter((p.available_afternoon for p in professors), dtype=bool, count=len(professors))
     )
 
-    # 11. Set the names of the supervisors
-    model.nomi_docenti = model.docenti.get('Relatore').array
+    # Availability of the supervisor of each candidate, as [candidate, commission].
+    # It depends on the candidate when the supervisor is split
+    model.disponibilita_relatore = limits.shift_availability(
+        np.fromiter((c.supervisor_available_morning for c in problem.candidates), dtype=bool,
+                    count=len(problem.candidates)),
+        np.fromiter((c.supervisor_available_afternoon for c in problem.candidates), dtype=bool,
+                    count=len(problem.candidates))
+    )
 
-    # 12. Set the type of the supervisors
-    model.is_ordinario = dict()
-    model.disponibilita = dict()
-    model.durata = dict()
+    # 4. Commissions where each candidate can be discussed, i.e. where both the supervisor and the counter-supervisor
+    # are available. The assignment variables only exist for these pairs.
+    feasible = model.disponibilita_relatore.astype(bool)
+    counter_supervisors = np.fromiter((p if p is not None else -1 for p in model.controrelatore), dtype=np.int64,
+                                      count=len(problem.candidates))
+    with_counter_supervisor = counter_supervisors >= 0
+    feasible[with_counter_supervisor] &= model.disponibilita[counter_supervisors[with_counter_supervisor]].astype(bool)
+
+    model.commissioni_candidato = [[] for _ in problem.candidates]
+    model.candidati_commissione = [[] for _ in limits.commissions]
+    for t, com in zip(*(index.tolist() for index in np.nonzero(feasible))):
+        model.commissioni_candidato[t].append(com)
+        model.candidati_commissione[com].append(t)
+
+    # Coefficients of the candidates of each commission, in the same order
+    model.durate_commissione = [[model.durata[t] for t in candidates] for candidates in model.candidati_commissione]
+    model.magistrali_commissione = [[t for t in candidates if model.durata[t] > 15]
+                                    for candidates in model.candidati_commissione]
+    model.docenti_ordinari = np.flatnonzero(model.is_ordinario).tolist()
+
+    for t, c in enumerate(problem.candidates):
+        if len(model.commissioni_candidato[t]) == 0:
+            raise ValueError(f"The candidate {c.surname} {c.name} can't be assigned to any commission: "
+                             f"the supervisor and the counter-supervisor are never available at the same time")
+
+    model.assegnamenti = pyo.Set(
+        dimen=2,
+        initialize=[(t, com) for t, commissions in enumerate(model.commissioni_candidato) for com in commissions],
+        ordered=True
+    )
 
-    # 13. Set the duration of the candidates
-    for i, t in model.tesisti.iterrows():
-        model.durata[i] = t['Durata']
+    return model
 
-    # 14. Set the role and availability of the supervisors
-    for docente in model.nomi_docenti:
-        ruolo = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['tipo'].values[0]
-        )
-        disponibilita_mattino = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['MATTINA'].values[0]
-        )
-        disponibilita_pomeriggio = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['POMERIGGIO'].values[0]
 
+def add_commission_expressions(model: pyo.ConcreteModel):
+    """
+    Builds once the sums over the candidates and the professors of each commission, most of them shared by several
+    constraints, and the sums over the commissions of each professor. The x and z variables must already be defined.
+    """
+    model.durata_commissione = [
+        linear_sum([model.x[t, com] for t in model.candidati_commissione[com]], model.durate_commissione[com])
+        for com in model.commissioni
+    ]
+    model.docenti_commissione = [linear_sum([model.z[p, com] for p in model.docenti]) for com in model.commissioni]
+    model.ordinari_commissione = [linear_sum([model.z[p, com] for p in model.docenti_ordinari])
+                                  for com in model.commissioni]
+    model.commissioni_docente = [linear_sum([model.z[p, com] for com in model.commissioni]) for p in model.docenti]
+
+
+def professor_ranking(model: pyo.ConcreteModel) -> list[int]:
+    """
+    :return: The professors sorted by the number of candidates they have to attend, as supervisors or
+    counter-supervisors, from the largest.
+    """
+    candidates = np.bincount(model.relatore, minlength=len(model.docenti))
+    counter_supervisors = [p for p in model.controrelatore if p is not None]
+    if len(counter_supervisors) > 0:
+        candidates += np.bincount(counter_supervisors, minlength=len(model.docenti))
+    return np.argsort(-candidates, kind='stable').tolist()
+
+
+def add_symmetry_breaking(model: pyo.ConcreteModel, symmetry_breaking: SymmetryBreaking):
+    """
+    The commissions of the same part of the day are interchangeable, so every solution has many copies that only differ
+    by the numbering of the commissions, and the solver can waste a lot of time going through them.
+    These constraints only keep some of the copies of each solution, and they must be added after the rest of the model.
+    """
+    shifts = [list(model.commissioni_mattina), list(model.commissioni_pomeriggio)]
+    pairs = [(shift[i], shift[i + 1]) for shift in shifts for i in range(len(shift) - 1)]
+
+    if symmetry_breaking == SymmetryBreaking.USAGE:
+        # The commissions are used in order: if a commission is used, the previous one is used too
+        model.symUsageCst = pyo.Constraint(pairs, rule=lambda m, k, k_next: m.y[k] >= m.y[k_next])
+    elif symmetry_breaking == SymmetryBreaking.DURATION:
+        # The commissions are ordered by decreasing duration, which also puts the used ones first
+        model.symDurationCst = pyo.Constraint(
+            pairs,
+            rule=lambda m, k, k_next: m.durata_commissione[k] >= m.durata_commissione[k_next]
         )
-        if ruolo == 'PO':
-            model.is_ordinario[docente] = True
-        else:
-            model.is_ordinario[docente] = False
-
-        if disponibilita_mattino == 'NO':
-            for k in model.commissioni_mattina:
-                model.disponibilita[docente, k] = 0
-        else:
-            for k in model.commissioni_mattina:
-                model.disponibilita[docente, k] = 1
-
-        if disponibilita_pomeriggio == 'NO':
-            for k in model.commissioni_pomeriggio:
-                model.disponibilita[docente, k] = 0
-        else:
-            for k in model.commissioni_pomeriggio:
-                model.disponibilita[docente, k] = 1
-
-    # 15. Define the variables
+    elif symmetry_breaking == SymmetryBreaking.ANCHOR:
+        # The commissions are numbered in the order of their first professor in professor_ranking():
+        # the j-th professor can only be in the first j + 1 commissions.
+        ranking = professor_ranking(model)
+        for shift in shifts:
+            for j, p in enumerate(ranking[:len(shift) - 1]):
+                for k in shift[j + 1:]:
+                    model.z[p, k].fix(0)
+    elif symmetry_breaking != SymmetryBreaking.NONE:
+        raise ValueError(f"Unknown symmetry breaking {symmetry_breaking}")
+
+
+# The formats in which the model can be dumped for debugging, by their extension
+MODEL_DUMP_FORMATS = ('lp', 'mps', 'nl')
+
+
+def dump_model(model: pyo.ConcreteModel, base_path: Path, file_format: str, symbolic_labels: bool) -> Path:
+    """
+    Writes the model to a file, only useful for debugging: the solvers don't read it.
+    :param symbolic_labels: Name the variables and the constraints like in the model, instead of x1, c1 and so on. The
+    writer becomes much slower, and the file larger.
+    """
+    if file_format not in MODEL_DUMP_FORMATS:
+        raise ValueError(f"Unknown model format {file_format}")
+
+    model_path = base_path / f"model.{file_format}"
+    model.write(str(model_path), io_options={'symbolic_solver_labels': symbolic_labels})
+    return model_path
+
+
+# noinspection PyUnresolvedReferences
+@pause_gc
+def create_min_durata_model(problem: ProblemData, limits: ProblemLimits) -> pyo.ConcreteModel:
+    """
+    :raises ValueError: if the limits on the number of professors are not set.
+    """
+    if None in (limits.min_professors, limits.min_professors_masters, limits.max_professors):
+        raise ValueError("The online model needs the minimum and maximum number of professors")
+
+    # 1-3. Sets, parameters and data of the problem
+    model = create_base_model(problem, limits)
+
+    # 4. Parameters of the online model
+    model.min_docenti = pyo.Param(within=pyo.NonNegativeIntegers, initialize=limits.min_professors)
+    model.min_docenti_magistrale = pyo.Param(within=pyo.NonNegativeIntegers,
+                                             initialize=limits.min_professors_masters)
+    model.max_docenti = pyo.Param(within=pyo.NonNegativeIntegers, initialize=limits.max_professors)
+
+    # 5. Define the variables
     model.min_ord = pyo.Var(within=pyo.NonNegativeIntegers)
     model.max_ord = pyo.Var(within=pyo.NonNegativeIntegers)
     # model.min_doc = Var(within=NonNegativeIntegers)
 
-    # 16. Define the binary variables
-    model.x = pyo.Var(model.Candidati, model.Commissioni, within=pyo.Binary)
+    # 6. Define the binary variables
+    model.x = pyo.Var(model.assegnamenti, within=pyo.Binary)
     # y[c] rappresenta se la commissione c e' in uso
-    model.y = pyo.Var(model.Commissioni, within=pyo.Binary)
+    model.y = pyo.Var(model.commissioni, within=pyo.Binary)
     # y2[c] rappresenta se la commissione c e' magistrale
-    model.y2 = pyo.Var(model.Commissioni, within=pyo.Binary)
+    model.y2 = pyo.Var(model.commissioni, within=pyo.Binary)
 
-    model.z = pyo.Var(model.NomiDocenti, model.Commissioni, within=pyo.Binary)
+    model.z = pyo.Var(model.docenti, model.commissioni, within=pyo.Binary)
 
     model.w = pyo.Var(within=pyo.Reals)
     model.w2 = pyo.Var(within=pyo.Reals)
 
-    # 17. Define the objective function
+    add_commission_expressions(model)
+
+    # 7. Define the objective function
     model.alpha = 10000
     model.beta = 1000
     model.gamma = 10
@@ -136,72 +241,68 @@ def create_min_durata_model(dat_path: Path) -> pyo.AbstractModel:
     def obj_expression(model):
         return + model.alpha * model.w2 - model.beta * model.w \
             + model.gamma * (model.max_ord - model.min_ord) \
-            + sum(model.y[k] for k in model.CommissioniPomeriggio)
+            + linear_sum([model.y[k] for k in model.commissioni_pomeriggio])
 
     model.OBJ = pyo.Objective(rule=obj_expression, sense=pyo.minimize)
 
     # 1. tutti i candidati sono assegnati a una commissione
     def all_candidates_c(model, cand):
-        return sum(model.x[cand, com] for com in model.Commissioni) == 1
+        return linear_sum([model.x[cand, com] for com in model.commissioni_candidato[cand]]) == 1
 
     # 2. durata commissioni non deve eccedere la massima durata
     def comm_duration_c(model, com):
-        return sum(model.x[cand, com] * model.durata[cand] for cand in model.Candidati) <= model.maxDurata * model.y[
-            com]
+        return model.durata_commissione[com] <= model.max_durata * model.y[com]
 
     # 3. massimizzare la durata di ogni singola commissione (w è la minima durata di tutte le commissioni)
     def max_min_c(model, com):
-        return sum(model.durata[cand] * model.x[cand, com] for cand in model.Candidati) >= \
-            model.w - model.maxDurata * (1 - model.y[com])
+        return model.durata_commissione[com] >= \
+            model.w - model.max_durata * (1 - model.y[com])
 
     # 4. minimizzare durata di ogni commissione (w2 è la massima durata di tutte le commissioni)
     def max_min_c2(model, com):
-        return sum(model.durata[cand] * model.x[cand, com] for cand in model.Candidati) <= \
-            model.w2 + model.maxDurata * (1 - model.y[com])
+        return model.durata_commissione[com] <= \
+            model.w2 + model.max_durata * (1 - model.y[com])
 
     # 5. Relatori devono essere presenti per la commissione dei loro studenti
+    # (le commissioni in cui non sono disponibili sono già escluse da model.assegnamenti)
     def prof_avail_c(model, t, com):
-        rel = model.Tesisti['Relatore'][t]
-        return model.x[t, com] <= model.disponibilita[rel, com] * model.z[rel, com]
+        rel = model.relatore[t]
+        return model.x[t, com] <= model.z[rel, com]
 
     # 6. Controrelatori devono essere presenti per la commissione dei loro studenti
     def prof2_avail_c(model, t, com):
-        rel = model.Tesisti['Controrelatore'][t]
-        return model.x[t, com] <= model.disponibilita[rel, com] * model.z[rel, com] if pandas.notnull(
-            rel) else pyo.Constraint.Feasible
+        rel = model.controrelatore[t]
+        return model.x[t, com] <= model.z[rel, com] if rel is not None else pyo.Constraint.Skip
 
     # 7. Ogni docente deve essere al massimo in una commissione
     def prof_comm_c(model, p):
-        return sum(model.z[p, com] for com in model.Commissioni) <= 1
+        return model.commissioni_docente[p] <= 1
 
     # 8. min_ord deve essere il minimo numero di docenti ordinari per ogni commissione
     def prof_min_ord_c(model, com):
-        return sum(
-            model.z[p, com] * model.isOrdinario[p] for p in model.NomiDocenti) >= model.min_ord - model.max_doc * (
-                1 - model.y[com])
+        return model.ordinari_commissione[com] >= \
+            model.min_ord - model.max_docenti * (1 - model.y[com])
 
     # 9. max_ord deve essere il massimo numero di docenti ordinari per ogni commissione
     def prof_max_ord_c(model, com):
-        return sum(model.z[p, com] * model.isOrdinario[p] for p in model.NomiDocenti) <= model.max_ord
+        return model.ordinari_commissione[com] <= model.max_ord
 
     # 10. minDocenti deve essere il minimo numero di docenti per ogni commissione
     def prof_min_all_c(model, com):
-        return sum(model.z[p, com] for p in model.NomiDocenti) >= model.minDocenti * model.y[com]
+        return model.docenti_commissione[com] >= model.min_docenti * model.y[com]
 
     # 11. max_doc deve essere il massimo numero di docenti per ogni commissione
     def prof_max_all_c(model, com):
-        return sum(model.z[p, com] for p in model.NomiDocenti) <= model.max_doc
+        return model.docenti_commissione[com] <= model.max_docenti
 
     # 12. y2 indica se la commissione è magistrale o no
     # Se un tesista magistrale appartiene a una commissione c, c deve essere necessariamente magistrale
     def comm_mag1(model, t, com):
-        dur = model.durata[t]
-        return model.x[t, com] * int(dur > 15) <= model.y2[com]
+        return model.x[t, com] <= model.y2[com] if model.durata[t] > 15 else pyo.Constraint.Skip
 
     # 13. minDocentiMag deve essere il minimo numero di docenti per ogni commissione magistrale
     def comm_mag2(model, com):
-        return sum(model.z[p, com] for p in model.NomiDocenti) >= \
-            model.minDocentiMag * model.y2[com]
+        return model.docenti_commissione[com] >= model.min_docenti_magistrale * model.y2[com]
 
     # 14. Una commissione non puo' essere magistrale se non usata nella soluzione
     def comm_mag3(model, com):
@@ -210,154 +311,57 @@ def create_min_durata_model(dat_path: Path) -> pyo.AbstractModel:
     # 15. Una commissione non puo' essere indicata come magistrale se non ci sono tesisti
     # magistrali partecipanti a essa
     def comm_mag4(model, com):
-        return sum(model.x[t, com] * int(model.durata[t] > 15) for t in model.Candidati) >= model.y2[com]
-
-    model.allCandCst = pyo.Constraint(model.Candidati, rule=all_candidates_c)
-    model.commDurCst = pyo.Constraint(model.Commissioni, rule=comm_duration_c)
-    model.maxMinCst = pyo.Constraint(model.Commissioni, rule=max_min_c)
-    model.maxMinCst2 = pyo.Constraint(model.Commissioni, rule=max_min_c2)
-    model.profAvailCst = pyo.Constraint(model.Candidati, model.Commissioni, rule=prof_avail_c)
-
-    model.prof2AvailCst = pyo.Constraint(model.Candidati, model.Commissioni, rule=prof2_avail_c)
-    model.profCommCst = pyo.Constraint(model.NomiDocenti, rule=prof_comm_c)
-    model.profMinOrdCst = pyo.Constraint(model.Commissioni, rule=prof_min_ord_c)
-    model.profMaxOrdCst = pyo.Constraint(model.Commissioni, rule=prof_max_ord_c)
-    model.profMinAllCst = pyo.Constraint(model.Commissioni, rule=prof_min_all_c)
-    model.profMaxAllCst = pyo.Constraint(model.Commissioni, rule=prof_max_all_c)
-
-    model.comm_mag1 = pyo.Constraint(model.Candidati, model.Commissioni, rule=comm_mag1)
-    model.comm_mag2 = pyo.Constraint(model.Commissioni, rule=comm_mag2)
-    model.comm_mag3 = pyo.Constraint(model.Commissioni, rule=comm_mag3)
-    model.comm_mag4 = pyo.Constraint(model.Commissioni, rule=comm_mag4)
-
-    return model
-
+        return linear_sum([model.x[t, com] for t in model.magistrali_commissione[com]]) >= model.y2[com]
 
-# noinspection PyUnresolvedReferences
-def create_max_durata_model(dat_path: Path) -> pyo.AbstractModel:
-    model = pyo.AbstractModel()
+    model.allCandCst = pyo.Constraint(model.candidati, rule=all_candidates_c)
+    model.commDurCst = pyo.Constraint(model.commissioni, rule=comm_duration_c)
+    model.maxMinCst = pyo.Constraint(model.commissioni, rule=max_min_c)
+    model.maxMinCst2 = pyo.Constraint(model.commissioni, rule=max_min_c2)
+    model.profAvailCst = pyo.Constraint(model.assegnamenti, rule=prof_avail_c)
 
-    # 1. Parameters
-    model.max_durata = pyo.Param(within=pyo.Integers)
+    model.prof2AvailCst = pyo.Constraint(model.assegnamenti, rule=prof2_avail_c)
+    model.profCommCst = pyo.Constraint(model.docenti, rule=prof_comm_c)
+    model.profMinOrdCst = pyo.Constraint(model.commissioni, rule=prof_min_ord_c)
+    model.profMaxOrdCst = pyo.Constraint(model.commissioni, rule=prof_max_ord_c)
+    model.profMinAllCst = pyo.Constraint(model.commissioni, rule=prof_min_all_c)
+    model.profMaxAllCst = pyo.Constraint(model.commissioni, rule=prof_max_all_c)
 
-    # 2. Sets
-    model.commissioni_mattina = pyo.Set()
-    model.commissioni_pomeriggio = pyo.Set()
-
-    model.commissioni = model.commissioni_mattina | model.commissioni_pomeriggio
-
-    # 3. Data
-    model.excel_path = pyo.Param(within=pyo.Any)
-
-    # 4. Create the model instance
-    model = model.create_instance(str(dat_path))
-
-    # 5. Read the data from the excel file
-    # todo move to a csv file
-    model.tesisti = pandas.read_excel(pyo.value(model.excel_path), index_col=0, dtype={'Matricola': str})
-    # We drop the rows where the column 'Relatore' is not defined
-    model.tesisti = model.tesisti.dropna(subset=['Relatore'])
-
-    # 6. Set the candidates
-    model.candidati = set(model.tesisti.index)
-    model.n_tesisti = len(model.tesisti)
-
-    # 7. Set the supervisors
-    # We first load the supervisors, and to avoid duplicates we drop them
-    model.relatori = model.tesisti.drop_duplicates(subset='Relatore')
-    # todo load also the database IDs corresponding to all the professors
-    # Then, we select the columns we are interested in
-    model.relatori = model.relatori[['ID_Relatore', 'Relatore', 'Mattina', 'Pomeriggio', 'Ruolo']]
-    # Finally, we rename the columns of the new dataframe
-    model.relatori.columns = ['ID', 'Relatore', 'Mattina', 'Pomeriggio', 'tipo']
-
-    # 8. Set the counter-supervisors (the procedure is the same as for the supervisors)
-    model.controrelatori = model.tesisti.drop_duplicates(subset='Controrelatore').dropna(subset=['Controrelatore'])
-    model.controrelatori = model.controrelatori[
-        ['ID_Controrelatore', 'Controrelatore', 'Mattina.1', 'Pomeriggio.1', 'Ruolo.1']
-    ]
-    model.controrelatori.columns = ['ID', 'Relatore', 'Mattina', 'Pomeriggio', 'tipo']
-
-    # 9. Set the assistant supervisors
-    # model.co_relatori = model.tesisti.drop_duplicates(subset='Co-Relatore').dropna(subset=['Co-Relatore'])
-    # model.co_relatori = model.assistanti[['Assistente', 'Mattina', 'Pomeriggio', 'Ruolo.2']]
-    # model.co_relatori.columns = ['Relatore', 'Mattina', 'Pomeriggio', 'tipo']
-
-    # 10. Concatenate the supervisors, counter-supervisors and assistant supervisors
-    model.docenti = (
-        pandas
-        # .concat([model.relatori, model.controrelatori, model.co_relatori], ignore_index=True)
-        .concat([model.relatori, model.controrelatori], ignore_index=True)
-        .drop_duplicates().reset_index(drop=True)
-    )
+    model.comm_mag1 = pyo.Constraint(model.assegnamenti, rule=comm_mag1)
+    model.comm_mag2 = pyo.Constraint(model.commissioni, rule=comm_mag2)
+    model.comm_mag3 = pyo.Constraint(model.commissioni, rule=comm_mag3)
+    model.comm_mag4 = pyo.Constraint(model.commissioni, rule=comm_mag4)
 
-    # 11. Set the names of the supervisors
-    model.nomi_docenti = model.docenti.get('Relatore').array
+    add_symmetry_breaking(model, limits.symmetry_breaking)
 
-    # 12. Set the type of the supervisors
-    model.is_ordinario = dict()
-    model.disponibilita = dict()
-    model.durata = dict()
+    return model
 
-    # 13. Set the duration of the candidates
-    for i, t in model.tesisti.iterrows():
-        model.durata[i] = t['Durata']
 
-    # 14. Set the role and availability of the supervisors
-    for docente in model.nomi_docenti:
-        ruolo = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['tipo'].values[0]
-        )
-        disponibilita_mattino = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['Mattina'].values[0]
-        )
-        disponibilita_pomeriggio = (
-            model.docenti
-            .where(model.docenti['Relatore'] == docente)
-            .dropna(subset=['Relatore'])['Pomeriggio'].values[0]
+# noinspection PyUnresolvedReferences
+@pause_gc
+def create_max_durata_model(problem: ProblemData, limits: ProblemLimits) -> pyo.ConcreteModel:
+    # 1-4. Sets, parameters and data of the problem
+    model = create_base_model(problem, limits)
 
-        )
-        if ruolo == 'PO':
-            model.is_ordinario[docente] = 1
-        else:
-            model.is_ordinario[docente] = 0
-
-        if disponibilita_mattino == 'NO':
-            for k in model.commissioni_mattina:
-                model.disponibilita[docente, k] = 0
-        else:
-            for k in model.commissioni_mattina:
-                model.disponibilita[docente, k] = 1
-
-        if disponibilita_pomeriggio == 'NO':
-            for k in model.commissioni_pomeriggio:
-                model.disponibilita[docente, k] = 0
-        else:
-            for k in model.commissioni_pomeriggio:
-                model.disponibilita[docente, k] = 1
-
-    # 15. Define the variables
+    # 5. Define the variables
     model.min_ord = pyo.Var(within=pyo.NonNegativeIntegers)
     model.max_ord = pyo.Var(within=pyo.NonNegativeIntegers)
     model.min_doc = pyo.Var(within=pyo.NonNegativeIntegers)
     model.max_doc = pyo.Var(within=pyo.NonNegativeIntegers)
 
-    # 16. Define the binary variables
+    # 6. Define the binary variables
     # X: candidati assegnati a commissione
-    model.x = pyo.Var(model.candidati, model.commissioni, within=pyo.Binary)
+    model.x = pyo.Var(model.assegnamenti, within=pyo.Binary)
     # Y: commissione in uso
     model.y = pyo.Var(model.commissioni, within=pyo.Binary)
     # Z: docenti assegnati a commissione
-    model.z = pyo.Var(model.nomi_docenti, model.commissioni, within=pyo.Binary)
+    model.z = pyo.Var(model.docenti, model.commissioni, within=pyo.Binary)
 
     # W: massimizzare la durata di ogni singola commissione
     model.w = pyo.Var(within=pyo.Reals)
 
-    # 17. Define the objective function
+    add_commission_expressions(model)
+
+    # 7. Define the objective function
     model.alpha = 10000
     model.beta = 1000
     model.gamma = 10
@@ -367,78 +371,80 @@ def create_max_durata_model(dat_path: Path) -> pyo.AbstractModel:
                 model.alpha * model.w
                 - model.beta * (model.max_ord - model.min_ord)
                 - model.gamma * (model.max_doc - model.min_doc)
-                - sum(model.y[k] for k in model.commissioni_pomeriggio)
+                - linear_sum([model.y[k] for k in model.commissioni_pomeriggio])
         )
 
     model.OBJ = pyo.Objective(rule=obj_expression, sense=pyo.maximize)
 
-    # 18. Define the constraints
+    # 8. Define the constraints
     # 1. tutti i candidati sono assegnati a una commissione
     def all_candidates_c(model, cand):
-        return sum(model.x[cand, com] for com in model.commissioni) == 1
+        return linear_sum([model.x[cand, com] for com in model.commissioni_candidato[cand]]) == 1
 
     model.allCandCst = pyo.Constraint(model.candidati, rule=all_candidates_c)
 
     # 2. durata commissioni non deve eccedere la massima durata
     def comm_duration_c(model, com):
-        return sum(model.durata[cand] * model.x[cand, com] for cand in model.candidati) <= model.max_durata * model.y[
-            com]
+        return model.durata_commissione[com] <= model.max_durata * model.y[com]
 
     model.commDurCst = pyo.Constraint(model.commissioni, rule=comm_duration_c)
 
     # 3. massimizzare la durata di ogni singola commissione
     def max_min_c(model, com):
-        return sum(model.durata[cand] * model.x[cand, com] for cand in model.candidati) >= \
+        return model.durata_commissione[com] >= \
             model.w - model.max_durata * (1 - model.y[com])
 
     model.maxMinCst = pyo.Constraint(model.commissioni, rule=max_min_c)
 
     # 4. Relatori devono essere presenti per la commissione dei loro studenti
+    # (le commissioni in cui non sono disponibili sono già escluse da model.assegnamenti)
     def prof_avail_c(model, t, com):
-        rel = model.tesisti['Relatore'][t]
-        return model.x[t, com] <= model.disponibilita[rel, com] * model.z[rel, com]
+        rel = model.relatore[t]
+        return model.x[t, com] <= model.z[rel, com]
 
-    model.profAvailCst = pyo.Constraint(model.candidati, model.commissioni, rule=prof_avail_c)
+    model.profAvailCst = pyo.Constraint(model.assegnamenti, rule=prof_avail_c)
 
     # 4b. Controrelatori devono essere presenti per la commissione dei loro studenti
     def prof2_avail_c(model, t, com):
-        rel = model.tesisti['Controrelatore'][t]
-        return model.x[t, com] <= model.disponibilita[rel, com] * model.z[rel, com] if pandas.notnull(
-            rel) else pyo.Constraint.Feasible
+        rel = model.controrelatore[t]
+        return model.x[t, com] <= model.z[rel, com] if rel is not None else pyo.Constraint.Skip
 
-    model.prof2AvailCst = pyo.Constraint(model.candidati, model.commissioni, rule=prof2_avail_c)
+    model.prof2AvailCst = pyo.Constraint(model.assegnamenti, rule=prof2_avail_c)
 
     # 5. Ogni docente deve essere al massimo in una commissione
     def prof_comm_c(model, p):
-        return sum(model.z[p, com] for com in model.commissioni) <= 1
+        return model.commissioni_docente[p] <= 1
 
-    model.profCommCst = pyo.Constraint(model.nomi_docenti, rule=prof_comm_c)
+    model.profCommCst = pyo.Constraint(model.docenti, rule=prof_comm_c)
 
     # 6. min_ord deve essere il minimo numero di docenti ordinari per ogni commissione
     def prof_min_ord_c(model, com):
-        return sum(model.z[p, com] * model.is_ordinario[p] for p in model.nomi_docenti) >= model.min_ord - 50 * (
-                1 - model.y[com])
+        return model.ordinari_commissione[com] >= \
+            model.min_ord - 50 * (1 - model.y[com])
         # rimuovere -50....  in caso non vada bene
 
     model.profMinOrdCst = pyo.Constraint(model.commissioni, rule=prof_min_ord_c)
 
     # 6b. max_ord deve essere il massimo numero di docenti ordinari per ogni commissione
     def prof_max_ord_c(model, com):
-        return sum(model.z[p, com] * model.is_ordinario[p] for p in model.nomi_docenti) <= model.max_ord
+        return model.ordinari_commissione[com] <= model.max_ord
 
     model.profMaxOrdCst = pyo.Constraint(model.commissioni, rule=prof_max_ord_c)
 
     # 7. min_doc deve essere il minimo numero di docenti per ogni commissione
     def prof_min_all_c(model, com):
-        return sum(model.z[p, com] for p in model.nomi_docenti) >= model.min_doc - 50 * (1 - model.y[com])
+        return model.docenti_commissione[com] >= model.min_doc - 50 * (1 - model.y[com])
         # rimuovere -50....  in caso non vada bene
 
     model.profMinAllCst = pyo.Constraint(model.commissioni, rule=prof_min_all_c)
 
     # 7b. max_ord deve essere il massimo numero di docenti per ogni commissione
     def prof_max_all_c(model, com):
-        return sum(model.z[p, com] for p in model.nomi_docenti) <= model.max_doc
+        return model.docenti_commissione[com] <= model.max_doc
 
     model.profMaxAllCst = pyo.Constraint(model.commissioni, rule=prof_max_all_c)
 
+    # 9. Symmetry breaking
+    add_symmetry_breaking(model, limits.symmetry_breaking)
+
     return model
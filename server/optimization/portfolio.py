@@ -0,0 +1,115 @@
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pyomo.environ as pyo
+
+from model import SolverEnum
+
+# The time given to the solvers to stop by themselves after their own time limit, in seconds
+GRACE_TIME = 30
+
+
+@dataclass(frozen=True, slots=True)
+class SolverRun:
+    """
+    The outcome of a solver on a model. After the run, the variables of the model hold its solution, if it has one.
+    """
+    ok: bool
+    optimal: bool
+    time_limit_reached: bool
+    has_solution: bool
+    log: str
+    # Why the run failed, if it did
+    message: str | None = None
+    # False when the solution isn't the solver's own, but the heuristic solution it fell back to
+    from_solver: bool = True
+
+
+def race(model: pyo.ConcreteModel, runs: dict[SolverEnum, Callable[[pyo.ConcreteModel], SolverRun]],
+         time_limit: float, logger: logging.Logger) -> tuple[SolverEnum | None, dict[SolverEnum, SolverRun]]:
+    """
+    Runs the solvers in parallel, each in a process forked after the model has been built, so it isn't copied or built
+    again. As soon as a solver proves the optimality of its solution the others are stopped, otherwise the best
+    solution is taken once all the solvers have stopped, or when the time limit is reached.
+    Each solver is the leader of a process group, so that the executables it spawns are stopped with it.
+    :param time_limit: When the solvers that are still running are stopped, in seconds.
+    :return: The solver whose solution has been loaded into the model, None if no solver found one, and the outcome of
+    each solver that has stopped by itself.
+    """
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    variables = list(model.component_data_objects(pyo.Var))
+
+    def member(solver: SolverEnum, run: Callable[[pyo.ConcreteModel], SolverRun]):
+        os.setpgrp()
+        try:
+            outcome = run(model)
+        except Exception as e:
+            outcome = SolverRun(False, False, False, False, "", message=str(e))
+
+        values = [v.value for v in variables] if outcome.has_solution else None
+        objective = pyo.value(model.OBJ) if outcome.has_solution else None
+        results.put((solver, outcome, objective, values))
+
+    processes = {}
+    for solver, run in runs.items():
+        process = context.Process(target=member, args=(solver, run), name=f"portfolio-{solver.value}")
+        process.start()
+        processes[solver] = process
+    logger.info(f"Racing {', '.join(solver.value for solver in runs)}")
+
+    deadline = time.monotonic() + time_limit
+    outcomes: dict[SolverEnum, SolverRun] = {}
+    best: tuple[SolverEnum, SolverRun, float, list] | None = None
+    maximize = model.OBJ.sense == pyo.maximize
+
+    def better(outcome: SolverRun, objective: float) -> bool:
+        if best is None:
+            return True
+        # A solution found by a solver always beats one it fell back to
+        if outcome.from_solver != best[1].from_solver:
+            return outcome.from_solver
+        return objective > best[2] if maximize else objective < best[2]
+
+    while len(outcomes) < len(processes):
+        try:
+            solver, outcome, objective, values = results.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            logger.warning("The time limit of the portfolio has been reached")
+            break
+
+        outcomes[solver] = outcome
+        logger.info(f"{solver.value} has stopped: optimal {outcome.optimal}, objective {objective}")
+
+        # The solution of a run that failed can't be saved, however good it looks
+        if not outcome.ok or not outcome.has_solution:
+            continue
+        if better(outcome, objective):
+            best = (solver, outcome, objective, values)
+        if outcome.optimal and outcome.from_solver:
+            best = (solver, outcome, objective, values)
+            break
+
+    for solver, process in processes.items():
+        if solver not in outcomes:
+            logger.info(f"Stopping {solver.value}")
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                # It didn't become the leader of its group yet
+                process.kill()
+        process.join()
+
+    if best is None:
+        return None, outcomes
+
+    solver, _, _, values = best
+    for variable, value in zip(variables, values):
+        variable.set_value(value, skip_validation=True)
+    return solver, outcomes
@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from model import TimeAvailability, UniversityRole, SymmetryBreaking, Hashable
+
+if TYPE_CHECKING:
+    from model.model import Commission
+
+
+@dataclass(frozen=True, slots=True)
+class ProfessorData:
+    id: int
+    full_name: str
+    role: UniversityRole
+    available_morning: bool
+    available_afternoon: bool
+
+    @property
+    def is_ordinary(self) -> bool:
+        return self.role == UniversityRole.ORDINARY
+
+
+@dataclass(frozen=True, slots=True)
+class CandidateData:
+    # The ID of the student
+    id: int
+    surname: str
+    name: str
+    duration: int
+    supervisor_id: int
+    counter_supervisor_id: int | None
+    # The supervisor's availability for this candidate: professors that have to be split between the morning and the
+    # afternoon see half of their candidates in each.
+    supervisor_available_morning: bool
+    supervisor_available_afternoon: bool
+
+    @property
+    def is_masters(self) -> bool:
+        return self.duration > 15
+
+
+@dataclass(frozen=True, slots=True)
+class ProblemLimits:
+    """
+    The limits and the options set by an optimization configuration. The professor limits are only used by the online
+    model.
+    The commissions are numbered from 0, the morning ones first.
+    """
+    max_duration: int
+    commissions_morning: int
+    commissions_afternoon: int
+    min_professors: int | None = None
+    min_professors_masters: int | None = None
+    max_professors: int | None = None
+    symmetry_breaking: SymmetryBreaking = SymmetryBreaking.NONE
+
+    @property
+    def morning_commissions(self) -> range:
+        return range(0, self.commissions_morning)
+
+    @property
+    def afternoon_commissions(self) -> range:
+        return range(self.commissions_morning, self.commissions_morning + self.commissions_afternoon)
+
+    @property
+    def commissions(self) -> range:
+        return range(0, self.commissions_morning + self.commissions_afternoon)
+
+    def shift_availability(self, morning: np.ndarray, afternoon: np.ndarray) -> np.ndarray:
+        """
+        Expands the availability in the morning and in the afternoon to each commission.
+        :return: A (len(morning), number of commissions) array of 0/1 values.
+        """
+        is_afternoon = np.arange(len(self.commissions)) >= self.commissions_morning
+        return np.where(is_afternoon, afternoon[:, np.newaxis], morning[:, np.newaxis]).astype(np.int8)
+
+
+@dataclass(frozen=True, slots=True)
+class ProblemData:
+    """
+    Snapshot of the data of a commission needed by the optimization models.
+    It only holds plain values, so it is cheap to pickle and hand to the solver worker process.
+    """
+    commission_id: int
+    candidates: tuple[CandidateData, ...]
+    professors: dict[int, ProfessorData]
+
+    @staticmethod
+    def from_commission(commission: 'Commission') -> 'ProblemData':
+        """
+        :raises ValueError: if a supervisor or a counter-supervisor doesn't have a role.
+        """
+        professors: dict[int, ProfessorData] = {}
+        candidates = []
+
+        def add_professor(p) -> int:
+            if p.id not in professors:
+                if p.role == UniversityRole.UNSPECIFIED:
+                    raise ValueError(f"Professor '{p.full_name}' doesn't have a role")
+
+                professors[p.id] = ProfessorData(
+                    id=p.id,
+                    full_name=p.full_name,
+                    role=p.role,
+                    available_morning=p.availability.available_morning,
+                    available_afternoon=p.availability.available_afternoon
+                )
+            return p.id
+
+        entries_by_supervisor = {}
+        for entry in commission.entries:
+            entries_by_supervisor.setdefault(entry.supervisor_id, []).append(entry)
+
+        for supervisor_entries in entries_by_supervisor.values():
+            for index, entry in enumerate(supervisor_entries):
+                supervisor = entry.supervisor
+                if supervisor.availability == TimeAvailability.SPLIT:
+                    morning = index <= (len(supervisor_entries) / 2)
+                    afternoon = not morning
+                else:
+                    morning = supervisor.availability.available_morning
+                    afternoon = supervisor.availability.available_afternoon
+
+                # todo do the same for the supervisor assistant
+                candidates.append(CandidateData(
+                    id=entry.candidate.id,
+                    surname=entry.candidate.surname,
+                    name=entry.candidate.name,
+                    duration=entry.duration,
+                    supervisor_id=add_professor(supervisor),
+                    counter_supervisor_id=add_professor(entry.counter_supervisor)
+                    if entry.counter_supervisor is not None else None,
+                    supervisor_available_morning=morning,
+                    supervisor_available_afternoon=afternoon
+                ))
+
+        return ProblemData(commission.id, tuple(candidates), professors)
+
+    def hash(self) -> str:
+        """
+        Hash of the data seen by the optimization models, including the roles and the availability of the professors.
+        The candidates are identified by the ID of their student, so it is only comparable within the same commission.
+        """
+        return Hashable.hash_data((self.candidates, tuple(sorted(self.professors.items()))))
+
+    def export_xls(self, base_path: Path) -> Path:
+        """
+        Writes the data in the spreadsheet layout that the models used to read. It is only useful for debugging.
+        """
+        xls_path = base_path / "val.xls"
+
+        def si_no(yes: bool) -> str:
+            return 'SI' if yes else 'NO'
+
+        rows = []
+        for c in self.candidates:
+            supervisor = self.professors[c.supervisor_id]
+            row = [c.id, c.surname, c.name, c.duration, supervisor.id, supervisor.full_name, supervisor.role.abbr,
+                   si_no(c.supervisor_available_morning), si_no(c.supervisor_available_afternoon)]
+            if c.counter_supervisor_id is not None:
+                cs = self.professors[c.counter_supervisor_id]
+                row.extend([cs.id, cs.full_name, cs.role.abbr, si_no(cs.available_morning),
+                            si_no(cs.available_afternoon)])
+            rows.append(row)
+
+        df = pd.DataFrame(
+            rows,
+            columns=["ID_Studente", "Cognome", "Nome", "Durata", "ID_Relatore", "Relatore", "Ruolo", "Mattina",
+                     "Pomeriggio", "ID_Controrelatore", "Controrelatore", "Ruolo", "Mattina", "Pomeriggio"]
+        )
+        df.to_excel(xls_path, index=False)
+        return xls_path
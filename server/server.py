@@ -2,22 +2,32 @@ import concurrent.futures.process
 import logging
 import os
 import pathlib
+import shutil
+import tempfile
 import uuid
+from collections.abc import Callable, Iterable, Iterator
 
+import sqlalchemy as sa
 import sqlalchemy.exc
 from dotenv import dotenv_values
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from http import HTTPStatus
-import pandas as pd
-from sqlalchemy.orm import Session
-
-from model import TimeAvailability
-from model.model import Student, Commission, Professor, CommissionEntry, \
-    OptimizationConfiguration, SolutionCommission
-from model.enums import Degree, UniversityRole, SolverEnum
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker, selectinload
+
+from ingest import CommissionWriter, open_reader, import_commission, MissingColumnsError, UnsupportedFormatError, \
+    UploadJobRegistry, apply_delta, CommissionDelta, DuplicateMatriculationError
+from model import TimeAvailability, Hashable
+from model.model import Commission, Professor, OptimizationConfiguration, SolutionCommission, CommissionEntry, \
+    Student
+from model.enums import UniversityRole, SolverEnum, SymmetryBreaking
+from optimization.models import MODEL_DUMP_FORMATS
+from optimization.problem import ProblemData
 from session_maker import SessionMakerSingleton
 from utils.logging import is_valid_log_level
+from utils.payload_cache import PayloadCache
+from utils.streaming import json_array, buffered
 
 app = Flask(__name__)
 
@@ -29,6 +39,286 @@ HOST_PORT = 5000
 SERVER_PROCESS_NAME = "server"
 FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+# Uploads processed in the background are kept in memory up to this size, then they are moved to a temporary file.
+UPLOAD_SPOOL_SIZE = 16 * 1024 * 1024
+
+
+def is_config_flag_set(name: str) -> bool:
+    """
+    Checks if a boolean option has been enabled in the .env file.
+    """
+    return config.get(name, 'false').lower() in ('1', 'true', 'yes')
+
+
+def model_dump_format() -> str | None:
+    """
+    :return: The format of the copy of the optimization models written for debugging, None if they aren't written.
+    """
+    dump_format = config.get('MODEL_DUMP_FORMAT', 'none').lower()
+    if dump_format == 'none':
+        return None
+
+    if dump_format not in MODEL_DUMP_FORMATS:
+        logging.getLogger(SERVER_PROCESS_NAME).warning(
+            f"Unknown MODEL_DUMP_FORMAT {dump_format}, the models won't be written. "
+            f"Valid formats: none, {', '.join(MODEL_DUMP_FORMATS)}"
+        )
+        return None
+    return dump_format
+
+
+def is_flag_set(name: str) -> bool:
+    """
+    Checks if a boolean option has been enabled, either in the query string or in the form data of the request.
+    """
+    return request.values.get(name, 'false').lower() in ('1', 'true', 'yes')
+
+
+def list_arg(name: str, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Reads a comma separated list of values from the query string. All the allowed values are returned if the parameter
+    is missing.
+    :raises ValueError: if one of the values is not allowed.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return allowed
+
+    values = tuple(v.strip() for v in value.split(',') if v.strip() != '')
+    invalid = [v for v in values if v not in allowed]
+    if len(invalid) > 0:
+        raise ValueError(f"Invalid values for {name}: {', '.join(invalid)}. Allowed values are: {', '.join(allowed)}")
+    return values
+
+
+def positive_int_arg(name: str) -> int | None:
+    """
+    Reads a positive integer from the query string, if present.
+    :raises ValueError: if the value isn't a positive integer.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) <= 0:
+        raise ValueError(f"{name} must be a positive integer")
+    return int(value)
+
+
+def not_modified(etag: str | None) -> Response | None:
+    """
+    Builds the 304 response if the client already has the current representation.
+    """
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+
+    response = Response(status=HTTPStatus.NOT_MODIFIED)
+    response.set_etag(etag)
+    return response
+
+
+def tagged(response: Response, etag: str | None) -> Response:
+    if etag is not None:
+        response.set_etag(etag)
+        # The clients may store the response, but they have to check that it is still current before using it.
+        response.cache_control.no_cache = True
+    return response
+
+
+def commission_payload(cid: int, build: Callable[[], Iterable[str] | None]) -> Response | None:
+    """
+    Serves the requested representation of a commission, or of a part of it, identified by the path and the query
+    string. The ETag combines the stored version hash of the commission, which changes with every modification, with the
+    representation. The payload comes from the cache if its current version is there, otherwise it is streamed from
+    build and cached along the way, unless it's too large.
+    :param build: Produces the JSON of the representation, or returns None if the requested resource doesn't exist.
+    :return: None if the commission or the requested resource doesn't exist.
+    """
+    global payload_cache
+    variant = request.full_path
+
+    cached = payload_cache.get(cid, variant)
+    if cached is not None:
+        etag, body = cached
+        if (response := not_modified(etag)) is not None:
+            return response
+        return tagged(Response(body, mimetype='application/json'), etag)
+
+    # Taken before reading the version: if the commission changes in the meantime, we won't cache a stale payload.
+    generation = payload_cache.generation(cid)
+    session: Session
+    with SessionMakerSingleton.get_session_maker().begin() as session:
+        version_hash = session.query(Commission.version_hash).filter_by(id=cid).scalar()
+    if version_hash is None:
+        return None
+
+    etag = Hashable.hash_data(f"{version_hash}{variant}")
+    if (response := not_modified(etag)) is not None:
+        return response
+
+    parts = build()
+    if parts is None:
+        return None
+
+    def cache_while_streaming(chunks: Iterable[str]) -> Iterator[str]:
+        cached_chunks = []
+        size = 0
+        for chunk in chunks:
+            yield chunk
+            if cached_chunks is not None:
+                size += len(chunk)
+                # We stop collecting the large payloads, so that streaming them still takes constant memory
+                if size <= payload_cache.max_payload_bytes:
+                    cached_chunks.append(chunk)
+                else:
+                    cached_chunks = None
+        if cached_chunks is not None:
+            payload_cache.put(cid, version_hash, variant, etag, ''.join(cached_chunks).encode(), generation)
+
+    response = Response(stream_with_context(cache_while_streaming(buffered(parts))), mimetype='application/json')
+    return tagged(response, etag)
+
+
+def invalidate_payloads_on_commit(session_maker: sessionmaker):
+    """
+    Removes from the payload cache the commissions modified or deleted by a session, once its changes are committed.
+    """
+
+    @event.listens_for(session_maker, 'before_flush')
+    def collect_commissions(session: Session, flush_context, instances):
+        changed = session.info.setdefault('changed_commissions', set())
+        changed.update(obj.id for obj in [*session.dirty, *session.deleted] if isinstance(obj, Commission))
+
+    @event.listens_for(session_maker, 'after_commit')
+    def invalidate_commissions(session: Session):
+        global payload_cache
+        for cid in session.info.pop('changed_commissions', ()):
+            payload_cache.invalidate(cid)
+
+    @event.listens_for(session_maker, 'after_soft_rollback')
+    def forget_commissions(session: Session, previous_transaction):
+        session.info.pop('changed_commissions', None)
+
+
+# How many rows are fetched at once from the database when streaming a response.
+STREAM_BATCH_SIZE = 500
+
+
+def dumps(obj) -> str:
+    """
+    Encodes a part of a streamed response like jsonify does, with the app's JSON provider but without whitespace.
+    """
+    return app.json.dumps(obj, separators=(',', ':'))
+
+
+def stream_commission(cid: int, include: tuple[str, ...], fields: tuple[str, ...], limit: int | None,
+                      cursor: int | None, normalized: bool = False) -> Iterator[str]:
+    """
+    Serializes a commission as JSON while its entries and configurations are read from the database, so that the
+    response starts immediately and only one batch of rows is held in memory at a time.
+    The parameters are the ones of GET /commission/<cid>, already validated.
+
+    In the normalized format the entries and the solutions reference professors and students by ID, and each of them
+    is sent once in the professors and students objects at the end of the response, keyed by ID.
+    """
+    professor_ids = set()
+    student_ids = set()
+
+    session_maker = SessionMakerSingleton.get_session_maker()
+    session: Session
+    with session_maker.begin() as session:
+        commission = session.query(Commission.id, Commission.title).filter_by(id=cid).one()
+        yield f'{{"id":{dumps(commission.id)},"title":{dumps(commission.title)}'
+
+        if 'entries' in include:
+            # The entries are paginated on their ID: the cursor is the ID of the last entry already received.
+            query = (
+                session.query(CommissionEntry)
+                .options(*CommissionEntry.load_options(fields, normalized))
+                .filter(CommissionEntry.commission_id == commission.id)
+                .order_by(CommissionEntry.id)
+            )
+            if cursor is not None:
+                query = query.filter(CommissionEntry.id > cursor)
+            if limit is not None:
+                # One more row than needed tells us if there is another page
+                query = query.limit(limit + 1)
+
+            last_id = None
+            next_cursor = None
+            yield ',"entries":['
+            for index, entry in enumerate(query.yield_per(STREAM_BATCH_SIZE)):
+                if index == limit:
+                    next_cursor = last_id
+                    break
+                yield (',' if index > 0 else '') + dumps(entry.serialize(fields, normalized))
+                last_id = entry.id
+                if normalized:
+                    if 'candidate' in fields:
+                        student_ids.add(entry.candidate_id)
+                    professor_ids.update(getattr(entry, f"{field}_id")
+                                         for field in ('supervisor', 'supervisor_assistant', 'counter_supervisor')
+                                         if field in fields)
+            yield ']'
+
+            if limit is not None:
+                yield f',"next_cursor":{dumps(next_cursor)}'
+
+        if 'configurations' in include:
+            projection = {
+                'include_solutions': 'solutions' in include,
+                'include_executions': 'executions' in include,
+                'include_logs': 'logs' in include
+            }
+            configurations = (
+                session.query(OptimizationConfiguration)
+                .options(*OptimizationConfiguration.load_options(**projection))
+                .filter_by(commission_id=commission.id)
+                .order_by(OptimizationConfiguration.id)
+                # The solutions and the logs make the configurations heavy, so they are loaded one at a time
+                .yield_per(1)
+            )
+            def serialize_configuration(configuration: OptimizationConfiguration):
+                if normalized and projection['include_solutions']:
+                    for solution in configuration.solution_commissions:
+                        professor_ids.update(p.id for p in solution.professors)
+                        student_ids.update(s.id for s in solution.students)
+                return configuration.serialize(**projection, normalized=normalized)
+
+            yield ',"optimization_configurations":'
+            yield from json_array((serialize_configuration(c) for c in configurations), dumps)
+
+        if normalized:
+            professor_ids.discard(None)
+            for key, model, ids in (('professors', Professor, professor_ids), ('students', Student, student_ids)):
+                yield f',"{key}":{{'
+                objects = session.query(model).filter(model.id.in_(ids)).order_by(model.id).yield_per(STREAM_BATCH_SIZE)
+                for index, obj in enumerate(objects):
+                    yield f'{"," if index > 0 else ""}"{obj.id}":{dumps(obj.serialize())}'
+                yield '}'
+
+        yield '}'
+
+
+def stream_commissions() -> Iterator[str]:
+    """
+    Serializes all the commissions as a JSON array, loading them from the database a few at a time.
+    """
+    session_maker = SessionMakerSingleton.get_session_maker()
+    session: Session
+    with session_maker.begin() as session:
+        commissions = (
+            session.query(Commission)
+            .options(*Commission.full_load_options())
+            .order_by(Commission.id)
+            .yield_per(10)
+        )
+        yield from json_array((c.serialize() for c in commissions), dumps)
+
+
+# The parts of a commission that can be requested with the include parameter.
+# The solutions, the executions and their logs are only sent together with the configurations.
+COMMISSION_INCLUDES = ('entries', 'configurations', 'solutions', 'executions', 'logs')
+
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -42,126 +332,215 @@ def upload_file():
     if file.filename == '':
         return jsonify({'details': 'No selected file'}), HTTPStatus.BAD_REQUEST
 
-    try:
-        excel = pd.read_excel(file).fillna('None')
+    run_async = is_flag_set('async')
+    stream = file.stream
+    if run_async:
+        # The request stream is closed once the response is sent, so the background job needs its own copy.
+        stream = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+        shutil.copyfileobj(file.stream, stream)
+        stream.seek(0)
 
-        # Check if the file has ALL the expected columns
-        expected_columns = {'MATRICOLA', 'COGNOME', 'NOME', 'CELLULARE', 'EMAIL', 'EMAIL_ATENEO',
-                            'TIPO_CORSO_DESCRIZIONE', 'REL_COGNOME', 'REL_NOME', 'REL2_COGNOME', 'REL2_NOME',
-                            'CONTROREL_COGNOME', 'CONTROREL_NOME'}
-        actual_columns = set([col.upper() for col in excel.columns])
-        missing_columns = expected_columns - actual_columns
+    # Every path but the background import is done with the file when it returns
+    handed_over = False
+    try:
+        commission_name = request.form.get('title') or pathlib.PurePath(file.filename).stem
+        source_hash = Hashable.hash_stream(stream)
+
+        try:
+            # If the same file has already been uploaded, we don't need to parse it again.
+            session_maker = SessionMakerSingleton.get_session_maker()
+            session: Session
+            with session_maker.begin() as session:
+                existing = (
+                    session.query(Commission.id, Commission.title)
+                    .filter_by(source_hash=source_hash)
+                    .order_by(Commission.id)
+                    .first()
+                )
+                if existing is not None:
+                    if not is_flag_set('clone'):
+                        return jsonify({
+                            'success': 'File already uploaded',
+                            'duplicate': True,
+                            'commission': {
+                                'id': existing.id,
+                                'title': existing.title
+                            }
+                        }), HTTPStatus.OK
+
+                    writer = CommissionWriter(session, Commission(commission_name, source_hash))
+                    writer.copy_entries(existing.id)
 
-        if len(missing_columns) > 0:
+                    return jsonify({
+                        'success': 'Commission cloned',
+                        'duplicate': True,
+                        'cloned_from': existing.id,
+                        'commission': {
+                            'id': writer.commission.id,
+                            'title': writer.commission.title
+                        }
+                    }), HTTPStatus.CREATED
+
+        except Exception as e:
+            print(e)
+            return jsonify({'error': 'Error processing the file', 'details': str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+        try:
+            # The header is validated as soon as the file is opened, the rows are read later in batches.
+            reader = open_reader(stream, file.filename)
+        except UnsupportedFormatError as e:
+            return jsonify({'error': 'Unsupported file format', 'details': str(e)}), HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+        except MissingColumnsError as e:
             return jsonify({
                 'error': 'Some expected columns are missing',
-                'missing_columns': list(missing_columns)
+                'missing_columns': e.missing_columns
             }), HTTPStatus.UNPROCESSABLE_ENTITY
+        except Exception as e:
+            print(e)
+            return jsonify({'error': 'Error processing the file', 'details': str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
-        # The actual processing of the file, creating the objects and adding them to the database
-        session_maker = SessionMakerSingleton.get_session_maker()
-        commission_name = request.form.get('title') or file.filename.removesuffix(".xlsx").removesuffix(".xls")
-
-        def get_or_create_professor(ext_session: Session, name: str, surname: str):
-            """
-            This function checks if a professor exists in the database by their name and surname.
-            If the professor exists, it returns the professor object.
-            If the professor does not exist, it creates a new professor with the given name and surname,
-            and an unspecified role. The new professor is added to the session, and the function returns
-            the new professor object.
-
-            If either the name or surname is None, the function returns None. This is because both a name
-            and a surname are required to identify a professor.
-
-            Note: The role of a new professor is set to 'unspecified' by default.
-
-            Args:
-                ext_session (sqlalchemy.orm.session.Session): The session to use for querying the database.
-                name (str): The name of the professor. If this is None, the function returns None.
-                surname (str): The surname of the professor. If this is None, the function returns None.
-
-            Returns:
-                Professor: The existing or newly created professor object, or None if either name or surname is None.
-            """
-            if name is None or surname is None or name == "" or surname == "" or name == "None" or surname == "None":
-                return None
-
-            try:
-                prof = ext_session.query(Professor).filter_by(name=name, surname=surname).one()
-            except sqlalchemy.exc.NoResultFound:
-                prof = Professor(name, surname, UniversityRole.UNSPECIFIED)
-                ext_session.add(prof)
-            return prof
-
-        session: Session
+        if run_async:
+            global upload_jobs
+            job = upload_jobs.submit(reader, commission_name, source_hash)
+            # The job closes the reader, and with it the file, when it is done
+            handed_over = True
 
-        # Automatically commit the transaction if no exception is raised
-        with session_maker.begin() as session:
-            commission = Commission(title=commission_name)
-            session.add(commission)
-
-            for index, row in excel.iterrows():
-                print(row)
-
-                # Create a new student object
-                student = Student(
-                    matriculation_number=row['MATRICOLA'],
-                    name=row['NOME'],
-                    surname=row['COGNOME'],
-                    phone_number=row['CELLULARE'],
-                    personal_email=row['EMAIL'],
-                    university_email=row['EMAIL_ATENEO']
-                )
-                session.add(student)
-
-                # Retrieve or create the professors
-                professor = get_or_create_professor(session, row['REL_NOME'], row['REL_COGNOME'])
-                professor2 = get_or_create_professor(session, row['REL2_NOME'], row['REL2_COGNOME'])
-                counter_supervisor = get_or_create_professor(session, row['CONTROREL_NOME'], row['CONTROREL_COGNOME'])
-
-                # lowercase contains "magistrale" then it's a master degree
-                if "magistrale" in row['TIPO_CORSO_DESCRIZIONE'].lower():
-                    degree = Degree.MASTERS
-                else:
-                    degree = Degree.BACHELORS
-
-                # Create a new commission entry
-                entry = CommissionEntry(
-                    candidate=student,
-                    degree_level=degree,
-                    supervisor=professor,
-                    supervisor_assistant=professor2,
-                    counter_supervisor=counter_supervisor
-                )
-                session.add(entry)
-
-                # Add the student and the commission entry to the session
-                commission.entries.append(entry)
+            return jsonify({
+                'success': 'File accepted, processing started',
+                'job': job.serialize()
+            }), HTTPStatus.ACCEPTED, {'Location': f"/upload/{job.id}"}
 
-            session.flush()
+        try:
+            # The actual processing of the file, creating the objects and adding them to the database
+            commission_id, commission_title = import_commission(session_maker, reader, commission_name,
+                                                                source_hash=source_hash)
 
             return jsonify({
                 'success': 'File processed successfully',
                 'commission': {
-                    'id': commission.id,
-                    'title': commission.title
+                    'id': commission_id,
+                    'title': commission_title
                 }
             }), HTTPStatus.CREATED
 
+        except Exception as e:
+            print(e)
+            return jsonify({'error': 'Error processing the file', 'details': str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+    finally:
+        if not handed_over:
+            stream.close()
+
+
+@app.route('/commission/<cid>/upload', methods=['PUT'])
+def reimport_commission(cid: int):
+    """
+    Updates the entries of an existing commission with a new version of its file, applying only the differences.
+    With dry_run set, the differences are computed and reported without saving them.
+    """
+    if 'file' not in request.files:
+        return jsonify({'details': "Nessun file specificato"}), HTTPStatus.BAD_REQUEST
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'details': 'No selected file'}), HTTPStatus.BAD_REQUEST
+
+    source_hash = Hashable.hash_stream(file.stream)
+
+    try:
+        reader = open_reader(file.stream, file.filename)
+    except UnsupportedFormatError as e:
+        return jsonify({'error': 'Unsupported file format', 'details': str(e)}), HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+    except MissingColumnsError as e:
+        return jsonify({
+            'error': 'Some expected columns are missing',
+            'missing_columns': e.missing_columns
+        }), HTTPStatus.UNPROCESSABLE_ENTITY
     except Exception as e:
         print(e)
         return jsonify({'error': 'Error processing the file', 'details': str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+    session_maker = SessionMakerSingleton.get_session_maker()
+    try:
+        session: Session
+        with session_maker.begin() as session:
+            # Locking the commission serializes the re-import with solve_commission(), which bumps its version when it
+            # locks a configuration: either the solver starts on the updated entries, or it is seen running below.
+            commission = session.query(Commission).filter_by(id=cid).with_for_update().first()
+            if commission is None:
+                reader.close()
+                return jsonify({'error': f'Commission with ID {cid} not found'}), HTTPStatus.NOT_FOUND
+
+            # The running configurations are solving the current entries, and would save their solution for them
+            running = session.scalars(
+                sa.select(OptimizationConfiguration.id)
+                .where(OptimizationConfiguration.commission_id == cid, OptimizationConfiguration.run_lock,
+                       ~OptimizationConfiguration.execution_details.any())
+            ).all()
+            if len(running) > 0:
+                reader.close()
+                return jsonify({
+                    'error': 'Some configurations of the commission are being solved',
+                    'configurations': running
+                }), HTTPStatus.CONFLICT
+
+            if commission.source_hash == source_hash:
+                # The commission has been imported from this very file, there is nothing to compare.
+                reader.close()
+                delta = CommissionDelta(unchanged=session.query(CommissionEntry).filter_by(commission_id=cid).count())
+            else:
+                delta = apply_delta(session, commission, reader)
+                commission.source_hash = source_hash
+                if delta.changed:
+                    commission.bump_version()
+
+            commission_id, title = commission.id, commission.title
+            dry_run = is_flag_set('dry_run')
+            if dry_run:
+                session.rollback()
+
+            return jsonify({
+                'success': 'Delta computed' if dry_run else 'Commission updated',
+                'dry_run': dry_run,
+                'commission': {
+                    'id': commission_id,
+                    'title': title
+                },
+                'delta': delta.serialize()
+            }), HTTPStatus.OK
+
+    except DuplicateMatriculationError as e:
+        return jsonify({
+            'error': 'Duplicate matriculation numbers',
+            'details': str(e),
+            'matriculation_numbers': e.matriculation_numbers
+        }), HTTPStatus.UNPROCESSABLE_ENTITY
+    except Exception as e:
+        print(e)
+        return jsonify({'error': 'Error updating the commission', 'details': str(e)}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@app.route('/upload/<job_id>', methods=['GET'])
+def get_upload_job(job_id: str):
+    global upload_jobs
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Upload job {job_id} not found'}), HTTPStatus.NOT_FOUND
+
+    return jsonify(job.serialize()), HTTPStatus.OK
+
 
 @app.route('/commissions', methods=['GET'])
 def get_commissions():
+    # The summaries are enough to draw a list, the full commissions are only sent when explicitly requested.
+    if request.args.get('view', 'summary') != 'summary':
+        return Response(stream_with_context(buffered(stream_commissions())), mimetype='application/json')
+
     session_maker = SessionMakerSingleton.get_session_maker()
 
     try:
         session: Session
         with session_maker.begin() as session:
-            commissions = session.query(Commission).all()
-            return jsonify([c.serialize() for c in commissions]), HTTPStatus.OK
+            return jsonify(Commission.summaries(session)), HTTPStatus.OK
 
     except Exception as e:
         print(e)
@@ -185,12 +564,25 @@ def get_commission(cid: int | None):
                 return jsonify([{'id': cid, 'title': title} for cid, title in commissions]), HTTPStatus.OK
             else:
                 # ID provided, return specific commission
-                commission = session.query(Commission).filter_by(id=cid).first()
-                if commission is None:
+                try:
+                    include = list_arg('include', COMMISSION_INCLUDES)
+                    fields = list_arg('fields', CommissionEntry.FIELDS)
+                    limit = positive_int_arg('limit')
+                    cursor = positive_int_arg('cursor')
+                    response_format = request.args.get('format', 'nested')
+                    if response_format not in ('nested', 'normalized'):
+                        raise ValueError("format must be either nested or normalized")
+                except ValueError as e:
+                    return jsonify({'error': 'Invalid parameters', 'details': str(e)}), HTTPStatus.BAD_REQUEST
+
+                response = commission_payload(
+                    int(cid),
+                    lambda: stream_commission(int(cid), include, fields, limit, cursor,
+                                              normalized=response_format == 'normalized')
+                )
+                if response is None:
                     return jsonify({'error': 'Commission not found'}), HTTPStatus.NOT_FOUND
-                else:
-                    # noinspection PyArgumentList
-                    return jsonify(commission.serialize()), HTTPStatus.OK
+                return response
 
     except Exception as e:
         print(e)
@@ -206,26 +598,41 @@ def get_configuration(cid: int, config_id: int | None):
     session_maker = SessionMakerSingleton.get_session_maker()
 
     try:
-        with session_maker.begin() as session:
-            if config_id is None:
-                # No ID provided, return all configurations for the commission
-                configurations: list[OptimizationConfiguration] = (
-                    session.query(OptimizationConfiguration)
-                    .filter_by(commission_id=cid)
-                    .all()
-                )
-                return jsonify([c.serialize() for c in configurations]), HTTPStatus.OK
-            else:
-                # ID provided, return specific configuration
-                configuration = (
-                    session.query(OptimizationConfiguration)
-                    .filter_by(id=config_id, commission_id=cid)
-                    .first()
-                )
-                if configuration is None:
-                    return jsonify({'error': 'Configuration not found'}), HTTPStatus.NOT_FOUND
-                else:
-                    return jsonify(configuration.serialize()), HTTPStatus.OK
+        # The configurations are versioned and cached together with their commission
+        if config_id is None:
+            # No ID provided, return all configurations for the commission
+            def stream_configurations():
+                session: Session
+                with session_maker.begin() as session:
+                    configurations = (
+                        session.query(OptimizationConfiguration)
+                        .options(*OptimizationConfiguration.load_options())
+                        .filter_by(commission_id=cid)
+                        .order_by(OptimizationConfiguration.id)
+                        .yield_per(1)
+                    )
+                    yield from json_array((c.serialize() for c in configurations), dumps)
+
+            response = commission_payload(int(cid), stream_configurations)
+            if response is None:
+                return jsonify([]), HTTPStatus.OK
+            return response
+        else:
+            # ID provided, return specific configuration
+            def serialize_configuration():
+                session: Session
+                with session_maker.begin() as session:
+                    configuration = (
+                        session.query(OptimizationConfiguration)
+                        .filter_by(id=config_id, commission_id=cid)
+                        .first()
+                    )
+                    return [dumps(configuration.serialize())] if configuration is not None else None
+
+            response = commission_payload(int(cid), serialize_configuration)
+            if response is None:
+                return jsonify({'error': 'Configuration not found'}), HTTPStatus.NOT_FOUND
+            return response
 
     except Exception as e:
         print(e)
@@ -247,6 +654,7 @@ def create_configuration(cid: int):
 
             configuration = OptimizationConfiguration(cid, "Nuova configurazione")
             session.add(configuration)
+            Commission.bump_versions(session, [cid])
             # needed to actually have the database generate the ID
             session.flush()
 
@@ -300,6 +708,7 @@ def update_configuration(cid: int, config_id: int):
                     }), HTTPStatus.CONFLICT
 
             new_config: dict = request.get_json()
+            Commission.bump_versions(session, [cid])
 
             configuration.title = new_config.get('title', configuration.title)
             configuration.max_duration = new_config.get('max_duration', configuration.max_duration)
@@ -313,32 +722,32 @@ def update_configuration(cid: int, config_id: int):
             if configuration.online:
                 configuration.min_professor_number = new_config.get('min_professor_number',
                                                                     configuration.min_professor_number)
-                configuration.max_professor_number = new_config.get('max_professor_number',
-                                                                    configuration.max_professor_number)
+                configuration.max_professor_numer = new_config.get('max_professor_number',
+                                                                    configuration.max_professor_numer)
                 configuration.min_professor_number_masters = new_config.get('min_professor_number_masters',
                                                                             configuration.min_professor_number_masters)
 
                 if (configuration.min_professor_number is None or
-                        configuration.max_professor_number is None or
+                        configuration.max_professor_numer is None or
                         configuration.min_professor_number_masters is None):
                     session.rollback()
                     return jsonify({
                         'error': 'min_professor_number, max_professor_number and min_professor_number_masters must be '
                                  'specified'
                     }), HTTPStatus.BAD_REQUEST
-                elif configuration.min_professor_number > configuration.max_professor_number:
+                elif configuration.min_professor_number > configuration.max_professor_numer:
                     session.rollback()
                     return jsonify({
                         'error': 'min_professor_number must be less than or equal to max_professor_number'
                     }), HTTPStatus.BAD_REQUEST
-                elif configuration.min_professor_number_masters > configuration.max_professor_number:
+                elif configuration.min_professor_number_masters > configuration.max_professor_numer:
                     session.rollback()
                     return jsonify({
                         'error': 'min_professor_number_masters must be less than or equal to max_professor_number'
                     }), HTTPStatus.BAD_REQUEST
             else:
                 configuration.min_professor_number = None
-                configuration.max_professor_number = None
+                configuration.max_professor_numer = None
                 configuration.min_professor_number_masters = None
 
             solver_str: str | None = new_config.get('solver', None)
@@ -356,6 +765,17 @@ def update_configuration(cid: int, config_id: int):
                                                                    configuration.optimization_time_limit)
             configuration.optimization_gap = new_config.get('optimization_gap', configuration.optimization_gap)
 
+            symmetry_breaking: str | None = new_config.get('symmetry_breaking', None)
+            if symmetry_breaking is not None:
+                try:
+                    configuration.symmetry_breaking = SymmetryBreaking(symmetry_breaking.lower())
+                except ValueError:
+                    session.rollback()
+                    return jsonify({
+                        'error': 'Invalid symmetry breaking specified',
+                        'valid_symmetry_breaking': [sb.value for sb in SymmetryBreaking]
+                    }), HTTPStatus.BAD_REQUEST
+
             return jsonify({
                 'success': 'Configuration updated',
                 'updated_config': configuration.serialize()
@@ -394,6 +814,15 @@ def update_professor(pid: int):
 
                 professor.availability = TimeAvailability(new_availability)
 
+            # The professor is sent along with the entries of every commission that references them
+            Commission.bump_versions(session, session.scalars(
+                sa.select(CommissionEntry.commission_id).distinct().where(sa.or_(
+                    CommissionEntry.supervisor_id == professor.id,
+                    CommissionEntry.supervisor_assistant_id == professor.id,
+                    CommissionEntry.counter_supervisor_id == professor.id
+                ))
+            ).all())
+
             return jsonify({
                 'professor': professor.serialize(),
                 'response': f"Professor {professor.name} {professor.surname} ({pid}) updated"
@@ -426,9 +855,9 @@ def delete_commission(cid: int):
 # Path to the directories that hold the datfiles and solutions produced.
 # Inside this directory there is a directory with this structure:
 # temp
-# |- [problem_id] - [config_id] --- cfg.dat
-# |_ ...                         |_ model.lp
-#                                |_ val.xls
+# |- [problem_id] - [config_id] --- model.lp
+# |_ ...                         |_ log.txt
+#                                |_ val.xls (only with EXPORT_DEBUG_XLS)
 OPT_TMP_DIR = ".temp/"
 
 
@@ -442,7 +871,12 @@ def solve_commission(commission_id: int, config_id: int):
     try:
         with session_maker.begin() as session:
             logger.debug(f"Retrieving commission {commission_id} and configuration {config_id}")
-            commission: Commission = session.query(Commission).filter_by(id=commission_id).first()
+            commission: Commission = (
+                session.query(Commission)
+                .options(selectinload(Commission.entries).options(*CommissionEntry.load_options()))
+                .filter_by(id=commission_id)
+                .first()
+            )
             if commission is None:
                 logger.error(f"Commission with ID {commission_id} not found")
                 return jsonify({'error': f'Commission with ID {commission_id} not found'}), HTTPStatus.NOT_FOUND
@@ -471,23 +905,35 @@ def solve_commission(commission_id: int, config_id: int):
 
             logger.debug(f"Locking the configuration {config_id}")
             configuration.run_lock = True
+            commission.bump_version()
             session.flush()
 
             logger.debug(f"Setting up the optimization for commission {commission_id} and configuration {config_id}")
             base_path = pathlib.Path(OPT_TMP_DIR)
             cc_path = base_path / str(commission_id) / str(config_id)
 
-            # We create the configuration file
-            configuration.create_dat_file(cc_path)
-            logger.debug(f"Configuration file created at {cc_path}")
-            # And also the datafile that will be then loaded back by the optimizer
-            # noinspection PyArgumentList
-            commission.export_xls(cc_path)
+            cc_path.mkdir(parents=True, exist_ok=True)
+            # The data of the commission is handed to the worker process as a snapshot of plain values
+            problem = ProblemData.from_commission(commission)
+            if is_config_flag_set("EXPORT_DEBUG_XLS"):
+                # The spreadsheet isn't read by the optimizer anymore, but it is handy to inspect the data
+                problem.export_xls(cc_path)
+
+            # Runs on the same data and with the same options share the hash, and so their solution
+            version_hash = configuration.solution_hash(problem)
+            reused_from = SolutionCommission.reuse_solution(session, configuration, version_hash)
+            if reused_from is not None:
+                logger.info(f"Reused the solution of the configuration {reused_from} for commission {commission_id} "
+                            f"and configuration {config_id}")
+                return jsonify({
+                    'success': 'Solution reused',
+                    'reused_from': reused_from,
+                    'version_hash': version_hash
+                }), HTTPStatus.OK
 
-            version_hash = configuration.hash()
             session.expunge(configuration)
 
-            global executor
+            global executor, payload_cache
             # We start the optimization
             # todo save the future object in a dictionary to be able to interact with it later
             process_uuid = uuid.uuid4()
@@ -503,10 +949,16 @@ def solve_commission(commission_id: int, config_id: int):
 
             future: concurrent.futures.Future = executor.submit(
                 configuration.solver_wrapper,
+                problem,
                 cc_path,
                 version_hash,
-                process_logger
+                process_logger,
+                model_dump_format(),
+                is_config_flag_set("MODEL_DUMP_SYMBOLIC_LABELS")
             )
+            # The worker process saves the execution details and the solutions with its own sessions
+            solved_commission_id = commission.id
+            future.add_done_callback(lambda _: payload_cache.invalidate(solved_commission_id))
             logger.info(f"Optimization process started for commission {commission_id} and configuration {config_id}")
 
             return jsonify({
@@ -537,14 +989,21 @@ def basic_authentication():
 
 
 def main():
-    global executor
+    global executor, upload_jobs, payload_cache
 
     executor = concurrent.futures.ProcessPoolExecutor(max_workers=int(config.get("MAX_WORKERS", "4")))
+    upload_jobs = UploadJobRegistry(SessionMakerSingleton.get_session_maker(),
+                                    max_workers=int(config.get("MAX_UPLOAD_WORKERS", "2")),
+                                    logger=logging.getLogger(SERVER_PROCESS_NAME).getChild("upload"))
+    payload_cache = PayloadCache(max_bytes=int(config.get("PAYLOAD_CACHE_MB", "64")) * 1024 * 1024)
+    invalidate_payloads_on_commit(SessionMakerSingleton.get_session_maker())
     app.run(host=HOST_NAME, port=HOST_PORT, debug=True)
 
 
 if __name__ == '__main__':
     executor: concurrent.futures.process.ProcessPoolExecutor
+    upload_jobs: UploadJobRegistry
+    payload_cache: PayloadCache
 
     config = dotenv_values(verbose=True)
 
@@ -591,5 +1050,6 @@ if __name__ == '__main__':
 
     SessionMakerSingleton.initialize(db_url)
 
-    CORS(app, origins=[os.getenv("PUBLIC_API_URL"), os.getenv("PUBLIC_WEB_URL")])
+    # The web client reads the ETags to make conditional requests
+    CORS(app, origins=[os.getenv("PUBLIC_API_URL"), os.getenv("PUBLIC_WEB_URL")], expose_headers=['ETag', 'Location'])
     main()
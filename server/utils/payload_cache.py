@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+
+class PayloadCache:
+    """
+    LRU cache of serialized responses, bounded by their total size in bytes.
+
+    The payloads belong to a resource (e.g. a commission) and are keyed by its ID, its version and the variant of the
+    representation (e.g. the query string). The cache remembers the current version of each resource, so a hit doesn't
+    need to look it up anywhere else: the writers have to call invalidate() once their changes are committed.
+
+    Every invalidation also increases the generation of the resource. A reader takes the generation before reading the
+    version from the database, and its payload is discarded if the resource has been invalidated in the meantime,
+    otherwise a stale version could be cached after the invalidation.
+    """
+
+    def __init__(self, max_bytes: int, max_payload_bytes: int | None = None):
+        """
+        :param max_bytes: The maximum total size of the cached payloads.
+        :param max_payload_bytes: Larger payloads are not cached. A quarter of max_bytes by default.
+        """
+        self.max_bytes = max_bytes
+        self.max_payload_bytes = max_payload_bytes if max_payload_bytes is not None else max_bytes // 4
+        self.hits = 0
+        self.misses = 0
+        self._payloads: OrderedDict[tuple[int, str, str], tuple[str, bytes]] = OrderedDict()
+        self._versions: dict[int, str] = {}
+        self._generations: dict[int, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def generation(self, resource_id: int) -> int:
+        with self._lock:
+            return self._generations.get(resource_id, 0)
+
+    def get(self, resource_id: int, variant: str) -> tuple[str, bytes] | None:
+        """
+        :return: The ETag and the body of the current version of the resource, if they are cached.
+        """
+        with self._lock:
+            version = self._versions.get(resource_id)
+            payload = self._payloads.get((resource_id, version, variant)) if version is not None else None
+            if payload is None:
+                self.misses += 1
+                return None
+
+            self._payloads.move_to_end((resource_id, version, variant))
+            self.hits += 1
+            return payload
+
+    def put(self, resource_id: int, version: str, variant: str, etag: str, body: bytes, generation: int) -> bool:
+        """
+        Stores a payload, unless it is too large or the resource has been invalidated since generation was read.
+        :return: Whether the payload has been stored.
+        """
+        if len(body) > self.max_payload_bytes:
+            return False
+
+        with self._lock:
+            if self._generations.get(resource_id, 0) != generation:
+                return False
+
+            if self._versions.get(resource_id) != version:
+                self._discard(resource_id)
+                self._versions[resource_id] = version
+
+            key = (resource_id, version, variant)
+            if key in self._payloads:
+                self._size -= len(self._payloads.pop(key)[1])
+            self._payloads[key] = (etag, body)
+            self._size += len(body)
+
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._payloads.popitem(last=False)
+                self._size -= len(evicted)
+
+            return True
+
+    def invalidate(self, resource_id: int):
+        with self._lock:
+            self._generations[resource_id] = self._generations.get(resource_id, 0) + 1
+            self._versions.pop(resource_id, None)
+            self._discard(resource_id)
+
+    def _discard(self, resource_id: int):
+        for key in [key for key in self._payloads if key[0] == resource_id]:
+            self._size -= len(self._payloads.pop(key)[1])
@@ -0,0 +1,35 @@
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+# Size of the chunks handed to the WSGI server, so that it doesn't have to write every single element on its own.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def json_array(items: Iterable[Any], dumps: Callable[[Any], str]) -> Iterator[str]:
+    """
+    Encodes the items as a JSON array one element at a time, so that only one of them has to be serialized at once.
+    """
+    yield '['
+    for index, item in enumerate(items):
+        if index > 0:
+            yield ','
+        yield dumps(item)
+    yield ']'
+
+
+def buffered(parts: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins the small parts of a streamed response in chunks of at least chunk_size characters.
+    """
+    chunk = []
+    length = 0
+    for part in parts:
+        chunk.append(part)
+        length += len(part)
+        if length >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            length = 0
+
+    if len(chunk) > 0:
+        yield ''.join(chunk)
@@ -6,6 +6,8 @@ export class Poller<T> {
     private callback: (data: T) => void;
     readonly errorHandler: (error: Error) => void;
     private intervalId: number | null;
+    // ETag of the last response, sent back to let the server answer 304 when nothing changed
+    private etag: string | null = null;
 
     constructor(endpoint: string, interval: number, callback: (data: T) => void, errorHandler: (error: Error) => void) {
         this.interval = interval;
@@ -18,14 +20,21 @@ export class Poller<T> {
     start() {
         if (!browser) return;
         this.intervalId = window.setInterval(() => {
-            fetch(this.endpoint)
+            const headers: HeadersInit = this.etag !== null ? {'If-None-Match': this.etag} : {};
+            fetch(this.endpoint, {headers})
                 .then(response => {
+                    if (response.status === 304) {
+                        return null;
+                    }
                     if (!response.ok) {
                         throw new Error(`Failed to fetch data: ${response.statusText}`);
                     }
+                    this.etag = response.headers.get('ETag');
                     return response.json();
                 })
                 .then(data => {
+                    // Nothing changed since the last response
+                    if (data === null) return;
                     this.callback(data);
                 })
                 .catch(error => {
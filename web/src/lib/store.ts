@@ -45,6 +45,10 @@ export const deleteCommission = async (comm: Commission | CommissionPreview) =>
 export const handleUploadSuccess = (newCommission: CommissionPreview) => {
     console.log(newCommission);
     commissionsPreview.update((data) => {
+        // Re-uploading a file that was already imported gives back the existing commission
+        if (data.some((c) => c.id === newCommission.id)) {
+            return data;
+        }
         return [...data, newCommission];
     })
 }
@@ -8,7 +8,10 @@ export async function load({fetch, params}) {
     // We load the problem here to avoid the need to load it in the layout.
     // This way we can ensure that the problem is loaded before the layout is rendered.
     // This simplifies the layout code a lot.
-    let response = await fetch(`${env.PUBLIC_API_URL}/commission/${params.id}`);
+    // The solver logs are left out, the optimization page loads the one of the selected configuration by itself.
+    let response = await fetch(
+        `${env.PUBLIC_API_URL}/commission/${params.id}?include=entries,configurations,solutions,executions`
+    );
 
     if (!response.ok) {
         switch (response.status) {
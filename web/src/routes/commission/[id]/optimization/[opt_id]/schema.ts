@@ -1,5 +1,5 @@
 import {z} from "zod";
-import {type OptimizationConfiguration, type SolutionCommission, SolverType} from "../optimization_types";
+import {type OptimizationConfiguration, type SolutionCommission, SolverType, SymmetryBreaking} from "../optimization_types";
 
 export interface FormOptConf {
     id: number,
@@ -18,7 +18,8 @@ export interface FormOptConf {
 
     solver: SolverType,
     optimization_time_limit: number,
-    optimization_gap: number
+    optimization_gap: number,
+    symmetry_breaking: SymmetryBreaking
 }
 
 // Required because Superforms does not support a way to ignore certain fields, so the only way to ignore the
@@ -40,7 +41,8 @@ export function generateForForm(original: OptimizationConfiguration | undefined)
 
         solver: original.solver,
         optimization_time_limit: original.optimization_time_limit,
-        optimization_gap: original.optimization_gap
+        optimization_gap: original.optimization_gap,
+        symmetry_breaking: original.symmetry_breaking
     }
 }
 
@@ -58,6 +60,7 @@ export const optimizationConfigurationSchema = z.object({
     solver: z.nativeEnum(SolverType).default(SolverType.CPLEX),
     optimization_time_limit: z.coerce.number().min(60).default(60),
     optimization_gap: z.coerce.number().min(0).default(0.005),
+    symmetry_breaking: z.nativeEnum(SymmetryBreaking).default(SymmetryBreaking.NONE),
 }).refine((data) => {
     // If online, then the minimum number of professors must be defined
     return data.online ? data.min_professor_number !== null : true;
@@ -3,7 +3,18 @@ import type {Professor, Student} from "../commission_types";
 export enum SolverType{
     CPLEX = "cplex",
     GUROBI = "gurobi",
-    GLPK = "glpk"
+    GLPK = "glpk",
+    HIGHS = "highs",
+    CBC = "cbc",
+    HEURISTIC = "heuristic",
+    PORTFOLIO = "portfolio"
+}
+
+export enum SymmetryBreaking {
+    NONE = "none",
+    USAGE = "usage",
+    DURATION = "duration",
+    ANCHOR = "anchor"
 }
 
 export interface OptimizationConfiguration {
@@ -23,6 +34,7 @@ export interface OptimizationConfiguration {
     solver: SolverType,
     optimization_time_limit: number,
     optimization_gap: number,
+    symmetry_breaking: SymmetryBreaking,
 
     solution_commissions: SolutionCommission[]
     execution_details: ExecutionDetails[]
@@ -38,7 +50,10 @@ export interface ExecutionDetails {
     solver_reached_optimality: boolean,
     solver_reached_time_limit: boolean,
     error_message: string | null,
-    optimizer_log: string | null,
+    // The solver that produced the solution, the winner for a portfolio
+    solver: SolverType | null,
+    // Missing when the commission is loaded without the logs
+    optimizer_log?: string | null,
 }
 
 export interface SolutionCommission {
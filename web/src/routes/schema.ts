@@ -7,6 +7,7 @@ export const commissionFormSchema = z.object({
         .max(256, {message: "Il titolo della sessione deve avere al massimo 256 caratteri"}),
     excel: z
         .instanceof(File, {message: "E' necessario indicare il file della sessione."})
-        .refine((f) => f.name.includes('xls') || f.name.includes('xlsx'), "Il file della sessione deve essere in formato xls o xlsx")
+        .refine((f) => /\.(xlsx?|csv|parquet|arrows?|feather)$/i.test(f.name),
+            "Il file della sessione deve essere in formato xls, xlsx, csv, parquet o arrow")
         .nullable()
 });
\ No newline at end of file